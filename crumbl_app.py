@@ -1,8 +1,14 @@
+import time
+
 import streamlit as st
-import pandas as pd
-import joblib
-import plotly.express as px
-import numpy as np
+import plotly.io as pio
+
+from crumbl_cache import cached_predict_one, prediction_cache
+from crumbl_charts import CHARTS, figure_json
+from crumbl_data import DATA_PATH, data_fingerprint, ingest_sales
+from crumbl_model import get_model, registry
+from crumbl_predict import INTERVAL, enable_step_table, predict_intervals
+from crumbl_timing import span, timings
 
 
 # =============================================
@@ -40,35 +46,45 @@ def set_app_style():
     </style>
     """, unsafe_allow_html=True)
 
+rerun_start = time.perf_counter()
 set_app_style()
 
 # =============================================
 # 📊 DATA AND MODEL LOADING
 # =============================================
-@st.cache_data
-def load_data():
+@st.cache_resource
+def load_aggregates(fingerprint):
+    # Shared read-only across sessions; rebuilt only when the data file changes.
+    # The CSV is streamed in chunks so only the aggregates stay in memory; the
+    # charts are drawn from aggregates alone, so no row store is written.
     try:
-        df = pd.read_csv("crumbl_mock_data.csv")
-        if 'sales' in df.columns:
-            df = df.rename(columns={'sales': 'units_sold'})
-        elif 'units_sold' not in df.columns:
-            df['units_sold'] = np.random.randint(50, 200, size=len(df))
-        return df
+        return ingest_sales(DATA_PATH, store_format=None)
     except Exception as e:
         st.error(f"Data loading failed: {str(e)}")
         st.stop()
 
 def load_model():
     try:
-        model = joblib.load("crumbl_sales_model.pkl")
-        feature_columns = joblib.load("feature_columns.pkl")  
-        return model, feature_columns
+        loaded = get_model()
+        return loaded.model, loaded.feature_columns
     except Exception as e:
         st.error(f"Model loading failed: {str(e)}")
         st.stop()
 
-df = load_data()
-model, feature_columns = load_model()
+# The forest is compiled at model load into a step function of social
+# mentions per sidebar combination, so "Generate Prediction" is a single
+# searchsorted rather than a forest pass.
+enable_step_table()
+
+try:
+    data_version = data_fingerprint(DATA_PATH)
+except OSError as e:
+    st.error(f"Data loading failed: {str(e)}")
+    st.stop()
+with span("aggregates"):
+    aggregates = load_aggregates(data_version)
+with span("load_model"):
+    model, feature_columns = load_model()
 
 
 # =============================================
@@ -87,7 +103,7 @@ with st.sidebar:
     }
     flavor_selected = st.selectbox(
         "Cookie Flavor",
-        options=sorted(df['flavor'].unique()),
+        options=aggregates.flavors,
         format_func=lambda x: flavor_options.get(x, x)
     )
    
@@ -99,14 +115,14 @@ with st.sidebar:
     }
     weather_selected = st.selectbox(
         "Weather Condition",
-        options=sorted(df['weather'].unique()),
+        options=aggregates.weathers,
         format_func=lambda x: weather_icons.get(x, x)
     )
    
     # Location selection
     location_selected = st.selectbox(
         "Store Location",
-        options=sorted(df['location'].unique())
+        options=aggregates.locations
     )
    
     # Holidays and Social mentions
@@ -123,33 +139,38 @@ with st.sidebar:
 # =============================================
 def make_prediction():
     try:
-        input_data = pd.DataFrame(0, index=[0], columns=feature_columns)
-        
-        input_data['holiday'] = int(is_holiday)
-        input_data['social_media_mentions'] = social_mentions
-        
-        # Set weather 
-        weather_col = f"weather_{weather_selected}"
-        if weather_col in input_data.columns:
-            input_data[weather_col] = 1
-        
-        # Set flavor 
-        flavor_col = f"flavor_{flavor_selected}"
-        if flavor_col in input_data.columns:
-            input_data[flavor_col] = 1
-        
-        # Set location
-        location_col = f"location_{location_selected}"
-        if location_col in input_data.columns:
-            input_data[location_col] = 1
-
-        input_data = input_data[feature_columns]
-        
-        return model.predict(input_data)[0]
+        return cached_predict_one(flavor_selected, weather_selected, location_selected, is_holiday, social_mentions)
     except Exception as e:
         st.error(f"Prediction error: {str(e)}")
         return None
 
+def prediction_band():
+    # Spread of the forest's individual trees for the selected scenario.
+    scenario = (flavor_selected, weather_selected, location_selected, is_holiday, social_mentions)
+    band = predict_intervals([scenario])
+    return band["lower"][0], band["upper"][0]
+
+
+# =============================================
+# 📊 PERFORMANCE INSIGHTS
+# =============================================
+@st.cache_data(max_entries=64)
+def insight_figure(chart, flavor, data_version, _aggregates):
+    # Figure JSON per (chart, flavor, data version); data_version keys out the
+    # unhashable aggregates, which are rebuilt whenever the data file changes.
+    with span(f"figure_{chart.split()[0].lower()}"):
+        return figure_json(_aggregates, chart, flavor)
+
+@st.fragment
+def performance_insights(flavor):
+    # Only the selected chart is built and sent to the browser. Switching
+    # charts reruns just this fragment, not the prediction above it.
+    chart = st.radio("Chart", list(CHARTS), horizontal=True, label_visibility="collapsed",
+                     key="insight_chart")
+    payload = insight_figure(chart, flavor, data_version, aggregates)
+    if payload is not None:
+        st.plotly_chart(pio.from_json(payload), use_container_width=True)
+
 
 # =============================================
 # 🖥️ MAIN APP DISPLAY
@@ -165,11 +186,16 @@ st.markdown("<div class='header-text'> Crumbl Cookie Sales Predictor</div>", uns
 
 if st.button("✨ Generate Prediction", use_container_width=True):
     with st.spinner("Crunching cookie data..."):
-        prediction = make_prediction()
+        with span("make_prediction"):
+            prediction = make_prediction()
 
         if prediction:
-            avg_sales = df.groupby('flavor')['units_sold'].mean()[flavor_selected]
+            avg_sales = aggregates.flavor_mean[flavor_selected]
             change_pct = (prediction / avg_sales - 1) * 100
+            with span("prediction_band"):
+                lower, upper = prediction_band()
+            # Spread of individual tree outputs, not a demand prediction interval.
+            band_label = f"Tree spread P{INTERVAL[0] * 100:.0f}–P{INTERVAL[1] * 100:.0f}"
            
             # ========== PREDICTION CARD ==========
             with st.container():
@@ -193,6 +219,7 @@ if st.button("✨ Generate Prediction", use_container_width=True):
                     <div class='metric-card'>
                         <h3>Predicted Sales</h3>
                         <h2>{prediction:,.0f}</h2>
+                        <p>{band_label}: {lower:,.0f} – {upper:,.0f}</p>
                     </div>
                     """, unsafe_allow_html=True)
                
@@ -210,6 +237,7 @@ if st.button("✨ Generate Prediction", use_container_width=True):
                     <div class='metric-card'>
                         <h3>Batches Needed</h3>
                         <h2>{batches:,.0f}</h2>
+                        <p>{band_label}: {int(lower//12):,.0f} – {int(upper//12):,.0f}</p>
                     </div>
                     """, unsafe_allow_html=True)
                
@@ -244,49 +272,22 @@ if st.button("✨ Generate Prediction", use_container_width=True):
             # ========== DATA VISUALIZATIONS ==========
             st.markdown("---")
             st.subheader("📊 Performance Insights")
-           
-            tab1, tab2, tab3 = st.tabs(["Trend Analysis", "Weather Impact", "Location Comparison"])
-           
-            with tab1:
-                if 'week' in df.columns:
-                    weekly_data = df[df['flavor'] == flavor_selected].groupby('week')['units_sold'].mean().reset_index()
-                    fig = px.line(
-                        weekly_data,
-                        x='week',
-                        y='units_sold',
-                        title=f"Weekly Sales Trend for {flavor_selected}",
-                        template="plotly_white"
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-           
-            with tab2:
-                fig2 = px.box(
-                    df[df['flavor'] == flavor_selected],
-                    x='weather',
-                    y='units_sold',
-                    color='weather',
-                    title=f"Weather Impact on {flavor_selected} Sales",
-                    template="plotly_white"
-                )
-                st.plotly_chart(fig2, use_container_width=True)
-           
-            with tab3:
-                loc_data = df[df['flavor'] == flavor_selected].groupby('location')['units_sold'].mean().reset_index()
-                fig3 = px.bar(
-                    loc_data,
-                    x='location',
-                    y='units_sold',
-                    color='location',
-                    title=f"{flavor_selected} Sales by Location",
-                    template="plotly_white"
-                )
-                st.plotly_chart(fig3, use_container_width=True)
+            performance_insights(flavor_selected)
 
 
 # =============================================
 # 🔍 DEBUG SECTION (COLLAPSIBLE)
 # =============================================
+timings.record("rerun", time.perf_counter() - rerun_start)
+timings.log_summary()
+
 with st.expander("⚙️ Data Summary & Debug Info"):
-    st.write("### Dataset Columns:", df.columns.tolist())
-    st.write("### Sample Data:", df.head(3))
-    st.write("### Model Features Expected:", feature_columns)
\ No newline at end of file
+    st.write("### Dataset Columns:", aggregates.columns)
+    st.write("### Sample Data:", aggregates.sample)
+    st.write("### Rows Ingested:", aggregates.row_count)
+    st.write("### Model Features Expected:", feature_columns)
+    st.write("### Model Registry:", {"version": get_model().version, **registry.stats.as_dict()})
+    st.write("### Prediction Cache:", prediction_cache.stats())
+    st.write("### Stage Latency (ms):")
+    st.dataframe(timings.summary())
+    st.code(timings.prometheus_text(), language="text")
\ No newline at end of file
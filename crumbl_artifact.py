@@ -0,0 +1,134 @@
+"""Memory-mappable model artifact.
+
+    python crumbl_artifact.py --output crumbl_sales_model.forest
+
+Exports the compiled forest to one flat, versioned file: an 8-byte magic, the
+header length, a JSON header (format version, source model version, feature
+columns, tree depth, array dtypes/shapes/offsets) and then every node array,
+64-byte aligned. ``load_artifact`` maps the file read-only with ``np.memmap``
+and views the arrays in place, so nothing is unpickled, sklearn is never
+imported and every process serving the same file shares its page-cache pages.
+``get_model("crumbl_sales_model.forest")`` loads it through the registry.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from crumbl_forest import CompiledForest
+from crumbl_model import ARTIFACT_SUFFIX, FEATURES_PATH, MODEL_PATH, ModelRegistry
+
+MAGIC = b"CRUMBLF\x00"
+FORMAT_VERSION = 1
+ALIGN = 64
+ARTIFACT_PATH = os.path.splitext(MODEL_PATH)[0] + ARTIFACT_SUFFIX
+ARRAYS = ("feature", "threshold", "children", "value", "roots")
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+class ArtifactModel:
+    """Stand-in for the sklearn model, backed by a memory-mapped compiled forest."""
+
+    def __init__(self, compiled, feature_columns, header):
+        self.compiled = compiled
+        self.feature_names_in_ = list(feature_columns)
+        self.n_estimators = compiled.n_trees
+        self.header = header
+
+    def predict(self, X):
+        return self.compiled.predict(np.asarray(X, dtype=np.float32))
+
+
+def export_artifact(loaded, path=ARTIFACT_PATH, round_values=False):
+    """Write ``loaded``'s forest to ``path``; returns the header.
+
+    Thresholds are stored as float32 and node indices as int16/int32, which
+    does not change predictions. ``round_values`` also stores leaf values as
+    int16 whole units.
+    """
+    forest = CompiledForest.from_model(loaded.model).quantized(round_values)
+    arrays = {name: np.ascontiguousarray(getattr(forest, name)) for name in ARRAYS}
+    specs, offset = {}, 0
+    for name, array in arrays.items():
+        specs[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_version": loaded.version,
+        "feature_columns": list(loaded.feature_columns),
+        "depth": int(forest.depth),
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "arrays": specs,
+    }
+    encoded = json.dumps(header).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(encoded))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(encoded).to_bytes(8, "little"))
+            f.write(encoded)
+            for name, array in arrays.items():
+                f.seek(data_start + specs[name]["offset"])
+                f.write(array.tobytes())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return header
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a crumbl forest artifact")
+        length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(length))
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"{path} has artifact format {header['format_version']}, expected {FORMAT_VERSION}")
+    header["data_start"] = _aligned(len(MAGIC) + 8 + length)
+    return header
+
+
+def load_artifact(path=ARTIFACT_PATH):
+    """Map ``path`` read-only; returns ``(ArtifactModel, feature_columns)``."""
+    header = read_header(path)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        start = header["data_start"] + spec["offset"]
+        count = int(np.prod(spec["shape"]))
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    compiled = CompiledForest(depth=header["depth"], **arrays)
+    return ArtifactModel(compiled, header["feature_columns"], header), header["feature_columns"]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export the Crumbl forest as a memory-mappable artifact.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--features", default=FEATURES_PATH)
+    parser.add_argument("--output", default=ARTIFACT_PATH)
+    parser.add_argument("--round-values", action="store_true",
+                        help="Store leaf values as int16 whole units (smaller, up to 0.5 off per tree)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    loaded = ModelRegistry().get(args.model, args.features)
+    header = export_artifact(loaded, args.output, args.round_values)
+    print(f"wrote {args.output} ({os.path.getsize(args.output):,} bytes, "
+          f"format {header['format_version']}, model {header['model_version']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""Request micro-batching in front of the batch predictor.
+
+Concurrent callers each submit one scenario; the batcher collects whatever
+arrives within ``max_wait`` seconds (up to ``max_batch`` scenarios), stacks
+them into one feature matrix ordered by ``feature_columns`` and scores them
+with a single ``predict_batch`` call, then hands each caller its own result.
+``MicroBatcher`` serves threaded callers (e.g. Flask); ``AsyncMicroBatcher``
+does the same for asyncio code, running the predict in a worker thread. Both
+keep batch-size and queue-depth histograms.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from crumbl_model import get_model
+from crumbl_predict import predict_batch
+from crumbl_timing import Histogram
+
+MAX_BATCH = 256
+MAX_WAIT = 0.002  # seconds
+QUEUE_DEPTH_BOUNDS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def predict_with_current_model(scenarios):
+    # Resolve the model per batch so a hot-swapped pickle is picked up.
+    return predict_batch(scenarios, get_model())
+
+
+class _BatchStats:
+    """Counters and histograms shared by both batchers."""
+
+    def _init_stats(self):
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self.batch_sizes = Histogram()
+        self.queue_depths = Histogram(QUEUE_DEPTH_BOUNDS)
+
+    def _record_batch(self, size):
+        self.batches += 1
+        self.rows += size
+        self.largest_batch = max(self.largest_batch, size)
+        self.batch_sizes.observe(size)
+
+    def _predict_isolated(self, scenarios):
+        """``predict_fn`` over a batch, one result or exception per scenario.
+
+        If the batch call fails (e.g. one unknown category), the rows are
+        re-scored one at a time so only the offending callers get the error.
+        """
+        try:
+            return [float(p) for p in self.predict_fn(scenarios)]
+        except Exception as e:
+            if len(scenarios) == 1:
+                return [e]
+        results = []
+        for scenario in scenarios:
+            try:
+                results.append(float(self.predict_fn([scenario])[0]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch": self.rows / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queue_depth": self._queue.qsize(),
+            "batch_size_histogram": self.batch_sizes.snapshot(),
+            "queue_depth_histogram": self.queue_depths.snapshot(),
+        }
+
+    def prometheus_text(self, prefix="crumbl_batcher"):
+        return (
+            f"{prefix}_queue_depth {self._queue.qsize()}\n"
+            + self.batch_sizes.prometheus_text(f"{prefix}_batch_size")
+            + self.queue_depths.prometheus_text(f"{prefix}_queue_depth_at_submit")
+        )
+
+
+class MicroBatcher(_BatchStats):
+    def __init__(self, predict_fn=predict_with_current_model, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._init_stats()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="crumbl-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, scenario):
+        """Queue one scenario tuple; returns a Future resolving to its forecast."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self.queue_depths.observe(self._queue.qsize())
+        self._queue.put((scenario, future))
+        return future
+
+    def predict(self, scenario, timeout=None):
+        return self.submit(scenario).result(timeout)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            results = self._predict_isolated([scenario for scenario, _ in batch])
+            self._record_batch(len(batch))
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class AsyncMicroBatcher(_BatchStats):
+    """asyncio request coalescer; use as ``async with AsyncMicroBatcher() as b``.
+
+    ``predict_fn`` is a blocking batch predictor and runs in a worker thread so
+    the event loop keeps accepting requests while the forest is evaluated.
+    """
+
+    def __init__(self, predict_fn=predict_with_current_model, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._init_stats()
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def close(self):
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def predict(self, scenario):
+        """Forecast one scenario tuple, sharing a ``predict_fn`` call with concurrent callers."""
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queue_depths.observe(self._queue.qsize())
+        self._queue.put_nowait((scenario, future))
+        return await future
+
+    async def _collect(self, first):
+        loop = asyncio.get_running_loop()
+        batch = [first]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                item = self._queue.get_nowait()
+            else:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                self._queue.put_nowait(None)
+                break
+            batch.append(item)
+        return batch
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = await self._collect(first)
+            results = await asyncio.to_thread(self._predict_isolated, [scenario for scenario, _ in batch])
+            self._record_batch(len(batch))
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,195 @@
+"""Benchmarks for the prediction and dashboard paths.
+
+    python crumbl_bench.py --rows 10000 1000000 --output bench_results.json
+
+Times data loading, model loading, single-row predictions, batch prediction
+at several sizes, the per-flavor aggregates and the three insight figures on
+synthetic histories generated by ``crumbl_synth``. Results are written as
+JSON together with environment metadata so runs on the same box can be
+compared.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from crumbl_features import SCENARIO_FIELDS, feature_encoder
+from crumbl_data import DATA_PATH, build_aggregates, ingest_sales, read_sales
+from crumbl_forest import compiled_forest
+from crumbl_model import FEATURES_PATH, MODEL_PATH, ModelRegistry, get_model
+from crumbl_predict import forecast_cube, predict_batch, predict_one, step_table
+from crumbl_synth import generate, learn_profile, write
+
+BATCH_SIZES = (1, 100, 10_000, 1_000_000)
+DATASET_ROWS = (150, 100_000, 1_000_000)
+
+
+def measure(fn, repeat=5, warmup=1):
+    """Run ``fn`` and return wall-time stats in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+    }
+
+
+def synthetic_dataset(rows, path, weeks=52, seed=0):
+    """Write a synthetic history of roughly ``rows`` rows to ``path``; return the exact count."""
+    profile = learn_profile(read_sales(DATA_PATH))
+    stores = max(1, round(rows / (weeks * len(profile.flavors))))
+    return write(generate(profile, stores, weeks, seed=seed), path)
+
+
+def scenario_grid(rows, seed=0):
+    """Random scenarios drawn from the model's categories."""
+    rng = np.random.default_rng(seed)
+    encoder = feature_encoder(get_model())
+    return pd.DataFrame({
+        "flavor": rng.choice(encoder.categories("flavor"), rows),
+        "weather": rng.choice(encoder.categories("weather"), rows),
+        "location": rng.choice(encoder.categories("location"), rows),
+        "holiday": rng.integers(0, 2, rows),
+        "social_media_mentions": rng.integers(0, 301, rows),
+    })[list(SCENARIO_FIELDS)]
+
+
+def environment():
+    def version(module):
+        try:
+            return __import__(module).__version__
+        except Exception:
+            return None
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "hostname": platform.node(),
+        "git_commit": commit,
+        "packages": {m: version(m) for m in ("numpy", "pandas", "sklearn", "joblib", "plotly", "pyarrow")},
+    }
+
+
+def bench_model(repeat):
+    results = {}
+    results["load_model"] = measure(lambda: ModelRegistry().get(MODEL_PATH, FEATURES_PATH), repeat)
+
+    loaded = get_model()
+    compiled_forest(loaded)
+    scenario = ("Oreo", "Sunny", "Utah", True, 42)
+    results["predict_one_forest"] = measure(lambda: predict_one(*scenario, loaded=loaded), repeat * 20)
+    forecast_cube(loaded)
+    results["predict_one_cube"] = measure(lambda: predict_one(*scenario, loaded=loaded), repeat * 20)
+    loaded.derived.pop("forecast_cube", None)
+    step_table(loaded)
+    results["predict_one_step_table"] = measure(lambda: predict_one(*scenario, loaded=loaded), repeat * 20)
+    loaded.derived.pop("step_table", None)
+    results["predict_batch_1_sklearn"] = measure(
+        lambda: predict_batch([scenario], loaded, engine="sklearn"), repeat
+    )
+    return results
+
+
+def bench_batches(sizes, repeat):
+    loaded = get_model()
+    results = {}
+    for size in sizes:
+        grid = scenario_grid(size)
+        results[f"predict_batch_{size}"] = measure(lambda: predict_batch(grid, loaded), repeat if size < 1e6 else 1)
+    return results
+
+
+def bench_dataset(rows, repeat, workdir):
+    import plotly.express as px
+
+    from crumbl_charts import weather_figure
+
+    path = os.path.join(workdir, f"sales_{rows}.csv")
+    if rows == len(read_sales(DATA_PATH)):
+        shutil.copyfile(DATA_PATH, path)
+    else:
+        synthetic_dataset(rows, path)
+
+    results = {"load_data": measure(lambda: read_sales(path), repeat)}
+    read_sales(path, cache="parquet")
+    results["load_data_parquet"] = measure(lambda: read_sales(path, cache="parquet"), repeat)
+
+    sales = read_sales(path)
+    results["aggregates"] = measure(lambda: build_aggregates(sales), repeat)
+    results["ingest_streaming"] = measure(lambda: ingest_sales(path), repeat)
+
+    aggregates = build_aggregates(sales)
+    flavor = aggregates.flavors[0]
+    results["figure_trend"] = measure(
+        lambda: px.line(aggregates.weekly(flavor), x='week', y='units_sold').to_json(), repeat
+    )
+    results["figure_weather"] = measure(lambda: weather_figure(aggregates, flavor).to_json(), repeat)
+    results["figure_weather_raw_rows"] = measure(
+        lambda: px.box(aggregates.rows(flavor), x='weather', y='units_sold', color='weather').to_json(), repeat
+    )
+    results["figure_location"] = measure(
+        lambda: px.bar(aggregates.by_location(flavor), x='location', y='units_sold', color='location').to_json(),
+        repeat,
+    )
+    return results
+
+
+def run(dataset_rows=DATASET_ROWS, batch_sizes=BATCH_SIZES, repeat=5):
+    report = {"environment": environment(), "model": bench_model(repeat),
+              "batch": bench_batches(batch_sizes, repeat), "datasets": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in dataset_rows:
+            report["datasets"][str(rows)] = bench_dataset(rows, repeat, workdir)
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the Crumbl forecaster.")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DATASET_ROWS), help="Dataset sizes")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = run(args.rows, args.batch_sizes, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for section in ("model", "batch"):
+        for name, stats in report[section].items():
+            print(f"{name:32s} {stats['median_s'] * 1e3:10.3f} ms")
+    for rows, cases in report["datasets"].items():
+        for name, stats in cases.items():
+            print(f"{name + ' @' + rows:32s} {stats['median_s'] * 1e3:10.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Bounded, thread-safe LRU + TTL cache of single-scenario forecasts.
+
+Keys are the normalized scenario tuple; entries belong to one model version
+and the whole cache is dropped the first time a different version is seen, so
+replacing ``crumbl_sales_model.pkl`` invalidates it automatically. One module
+level instance is shared by every Streamlit session and service thread.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from crumbl_features import holiday_flag
+from crumbl_model import get_model
+from crumbl_predict import predict_one
+
+MAX_ENTRIES = 4096
+TTL_SECONDS = 3600.0
+
+
+def scenario_key(flavor, weather, location, holiday, mentions):
+    return (str(flavor), str(weather), str(location), holiday_flag(holiday), float(mentions))
+
+
+class PredictionCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._version = None
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "model_version": self._version,
+        }
+
+
+prediction_cache = PredictionCache()
+
+
+def cached_predict_one(flavor, weather, location, holiday, mentions, loaded=None, cache=prediction_cache):
+    """``predict_one`` behind the shared prediction cache."""
+    loaded = loaded or get_model()
+    key = scenario_key(flavor, weather, location, holiday, mentions)
+    value = cache.get(key, loaded.version)
+    if value is None:
+        value = predict_one(flavor, weather, location, holiday, mentions, loaded)
+        cache.put(key, loaded.version, value)
+    return value
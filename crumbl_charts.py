@@ -0,0 +1,72 @@
+"""Plotly figures for the Performance Insights section of the app.
+
+Each builder takes the shared ``SalesAggregates`` and a flavor. ``figure_json``
+serializes one chart so the app can cache the payload per
+(chart, flavor, data version) and only build the chart that is on screen.
+"""
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+def trend_figure(aggregates, flavor):
+    weekly_data = aggregates.weekly(flavor)
+    if weekly_data is None:
+        return None
+    return px.line(
+        weekly_data,
+        x='week',
+        y='units_sold',
+        title=f"Weekly Sales Trend for {flavor}",
+        template="plotly_white"
+    )
+
+
+def weather_figure(aggregates, flavor):
+    # Drawn from precomputed quartiles/whiskers plus a capped outlier sample,
+    # so the payload does not grow with the number of rows.
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, box in enumerate(aggregates.box_stats(flavor).itertuples(index=False)):
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Box(
+            name=box.weather, x=[box.weather], q1=[box.q1], median=[box.median], q3=[box.q3],
+            lowerfence=[box.lowerfence], upperfence=[box.upperfence],
+            marker_color=color, legendgroup=box.weather,
+        ))
+        if len(box.outliers):
+            fig.add_trace(go.Scatter(
+                name=box.weather, x=[box.weather] * len(box.outliers), y=box.outliers, mode="markers",
+                marker_color=color, legendgroup=box.weather, showlegend=False,
+            ))
+    fig.update_layout(
+        title=f"Weather Impact on {flavor} Sales",
+        xaxis_title="weather",
+        yaxis_title="units_sold",
+        template="plotly_white"
+    )
+    return fig
+
+
+def location_figure(aggregates, flavor):
+    return px.bar(
+        aggregates.by_location(flavor),
+        x='location',
+        y='units_sold',
+        color='location',
+        title=f"{flavor} Sales by Location",
+        template="plotly_white"
+    )
+
+
+# Tab label -> builder, in display order.
+CHARTS = {
+    "Trend Analysis": trend_figure,
+    "Weather Impact": weather_figure,
+    "Location Comparison": location_figure,
+}
+
+
+def figure_json(aggregates, chart, flavor):
+    """Plotly JSON for one chart, or None when there is nothing to plot."""
+    fig = CHARTS[chart](aggregates, flavor)
+    return None if fig is None else fig.to_json()
@@ -0,0 +1,193 @@
+"""Shrink the sales forest: fewer trees and reduced-precision node arrays.
+
+    python crumbl_compress.py --holdout holdout.csv --max-rmse-increase 0.01 \
+        --artifact crumbl_sales_model.compressed.forest
+
+Trees are picked by greedy forward selection: starting from none, the tree
+whose addition gives the lowest RMSE on the held-out CSV is added until
+``--trees`` are chosen or the subset is within ``--max-rmse-increase`` of the
+full forest. The holdout must not share rows with the training CSV
+(``--data``); selecting on training rows overfits and makes the guardrail
+meaningless, so that is refused.
+
+The kept trees are written as a regular ``RandomForestRegressor`` pickle with
+their float64 nodes untouched, so ``get_model`` and the app load it unchanged
+(copy it over ``crumbl_sales_model.pkl`` to hot-swap). The reduced-precision
+form (float32 thresholds, int16 node indices and, with ``--round-values``,
+int16 leaf values) is only stored by ``--artifact``, a ``crumbl_artifact``
+``.forest`` file the registry memory-maps.
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from crumbl_artifact import export_artifact
+from crumbl_bench import measure
+from crumbl_data import DATA_PATH, read_sales
+from crumbl_forest import CompiledForest
+from crumbl_model import FEATURES_PATH, MODEL_PATH, ModelRegistry
+from crumbl_train import encode_training_data
+
+OUTPUT_PATH = "crumbl_sales_model.compressed.pkl"
+
+
+def select_trees(per_tree, y, max_trees=None, max_rmse_increase=0.0):
+    """Greedy forward selection of trees against held-out targets.
+
+    ``per_tree`` is the ``(rows, trees)`` matrix of individual tree outputs.
+    Returns the chosen tree indices (in selection order) and the holdout RMSE
+    after each addition.
+    """
+    n_trees = per_tree.shape[1]
+    max_trees = min(max_trees or n_trees, n_trees)
+    target_rmse = np.sqrt(np.mean((per_tree.mean(axis=1) - y) ** 2)) * (1 + max_rmse_increase)
+    total = np.zeros(len(y))
+    available = np.ones(n_trees, dtype=bool)
+    selected, history = [], []
+    while len(selected) < max_trees:
+        k = len(selected) + 1
+        # RMSE of the ensemble if each candidate were added, all candidates at once.
+        candidate_rmse = np.sqrt(np.mean(((total[:, None] + per_tree) / k - y[:, None]) ** 2, axis=0))
+        candidate_rmse[~available] = np.inf
+        best = int(np.argmin(candidate_rmse))
+        selected.append(best)
+        history.append(float(candidate_rmse[best]))
+        available[best] = False
+        total += per_tree[:, best]
+        if history[-1] <= target_rmse:
+            break
+    return selected, history
+
+
+def compress_model(model, selected):
+    """A copy of ``model`` keeping only the ``selected`` trees."""
+    compressed = copy.copy(model)
+    compressed.estimators_ = [copy.deepcopy(model.estimators_[i]) for i in sorted(selected)]
+    compressed.n_estimators = len(compressed.estimators_)
+    return compressed
+
+
+def check_disjoint(holdout, training):
+    """Raise ValueError if any holdout row also appears in the training data."""
+    columns = [c for c in holdout.columns if c in training.columns]
+    shared = holdout[columns].astype(str).merge(training[columns].astype(str).drop_duplicates(), how="inner")
+    if len(shared):
+        raise ValueError(
+            f"{len(shared):,} of {len(holdout):,} holdout rows are also in the training data; "
+            "tree selection needs rows the model was not fitted on"
+        )
+
+
+def pickle_bytes(model, compress=3):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "model.pkl")
+        joblib.dump(model, path, compress=compress)
+        return os.path.getsize(path)
+
+
+def evaluate(model, X, y, feature_columns, repeat=5):
+    """Holdout error, latency and size for one model."""
+    frame = pd.DataFrame(X, columns=feature_columns)
+    error = model.predict(frame) - y
+    forest = CompiledForest.from_model(model)
+    return {
+        "trees": len(model.estimators_),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "mae": float(np.mean(np.abs(error))),
+        "pickle_bytes": pickle_bytes(model, compress=0),
+        "pickle_bytes_compressed": pickle_bytes(model),
+        "compiled_bytes": forest.nbytes,
+        "artifact_bytes_rounded": forest.quantized(round_values=True).nbytes,
+        "sklearn_batch_s": measure(lambda: model.predict(frame), repeat)["median_s"],
+        "compiled_row_s": measure(lambda: forest.predict_row(X[0]), repeat * 20)["median_s"],
+    }
+
+
+def compress(holdout_path, model_path=MODEL_PATH, features_path=FEATURES_PATH, data_path=DATA_PATH,
+             max_trees=None, max_rmse_increase=0.01):
+    """Return ``(compressed_model, report)``; ``data_path`` is the training CSV."""
+    model = joblib.load(model_path)
+    feature_columns = joblib.load(features_path)
+    holdout = read_sales(holdout_path)
+    check_disjoint(holdout, read_sales(data_path))
+    X, y = encode_training_data(holdout, feature_columns)
+    per_tree = CompiledForest.from_model(model).tree_predictions(X)
+    selected, history = select_trees(per_tree, y, max_trees, max_rmse_increase)
+    compressed = compress_model(model, selected)
+    report = {
+        "holdout_rows": len(y),
+        "selection_rmse": history,
+        "full": evaluate(model, X, y, feature_columns),
+        "compressed": evaluate(compressed, X, y, feature_columns),
+    }
+    return compressed, report
+
+
+def format_report(report):
+    full, small = report["full"], report["compressed"]
+    lines = [f"holdout rows: {report['holdout_rows']:,}", f"{'':28}{'full':>14}{'compressed':>14}"]
+    rows = [
+        ("trees", "trees", "{:,}"),
+        ("holdout RMSE", "rmse", "{:,.2f}"),
+        ("holdout MAE", "mae", "{:,.2f}"),
+        ("pickle (bytes)", "pickle_bytes", "{:,}"),
+        ("pickle, joblib compress=3", "pickle_bytes_compressed", "{:,}"),
+        ("compiled arrays (bytes)", "compiled_bytes", "{:,}"),
+        ("  as --round-values artifact", "artifact_bytes_rounded", "{:,}"),
+        ("sklearn batch (ms)", "sklearn_batch_s", None),
+        ("compiled single row (us)", "compiled_row_s", None),
+    ]
+    for label, key, fmt in rows:
+        if fmt is None:
+            scale = 1e3 if key.startswith("sklearn") else 1e6
+            a, b = f"{full[key] * scale:,.1f}", f"{small[key] * scale:,.1f}"
+        else:
+            a, b = fmt.format(full[key]), fmt.format(small[key])
+        lines.append(f"{label:28}{a:>14}{b:>14}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compress the Crumbl sales RandomForest.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--features", default=FEATURES_PATH)
+    parser.add_argument("--holdout", required=True,
+                        help="Sales CSV the model was not trained on, used to pick trees and report error")
+    parser.add_argument("--data", default=DATA_PATH, help="Training CSV; the holdout may not share rows with it")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--artifact", default=None,
+                        help="Also export the kept trees as a memory-mappable .forest artifact")
+    parser.add_argument("--round-values", action="store_true",
+                        help="Store artifact leaf values as int16 whole units (up to 0.5 off per tree)")
+    parser.add_argument("--trees", type=int, default=None, help="Keep at most this many trees")
+    parser.add_argument("--max-rmse-increase", type=float, default=0.01,
+                        help="Stop adding trees once holdout RMSE is within this fraction of the full forest")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        compressed, report = compress(
+            args.holdout, args.model, args.features, args.data, args.trees, args.max_rmse_increase
+        )
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    joblib.dump(compressed, args.output, compress=3)
+    print(format_report(report))
+    print(f"wrote {args.output}")
+    if args.artifact:
+        export_artifact(ModelRegistry().get(args.output, args.features), args.artifact, args.round_values)
+        print(f"wrote {args.artifact}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
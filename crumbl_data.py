@@ -0,0 +1,485 @@
+"""Sales history loading and the precomputed aggregates behind the dashboard.
+
+Every chart and the "Vs Average" baseline only need a handful of grouped
+statistics per flavor. They are computed once per data file version (see
+``data_fingerprint``) instead of re-filtering the full history on each rerun,
+either from an in-memory frame (``build_aggregates``) or by streaming the CSV
+in chunks (``ingest_sales``) so only the aggregates are held in memory.
+"""
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from crumbl_model import file_fingerprint
+from crumbl_sketch import QuantileSketch, merged
+
+DATA_PATH = "crumbl_mock_data.csv"
+
+# Declared dtypes for the sales CSV. Low-cardinality text columns become
+# categoricals and store_id stays a (zero-padded) label rather than an int.
+SALES_SCHEMA = {
+    "week": "int16",
+    "store_id": "category",
+    "location": "category",
+    "flavor": "category",
+    "weather": "category",
+    "holiday": "category",
+    "social_media_mentions": "int32",
+    "sales": "int32",
+    "units_sold": "int32",
+}
+
+# Columnar cache formats written next to the CSV, by file suffix.
+CACHE_FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+
+# Schema metadata key for the source CSV's (mtime_ns, size) in cache files.
+SOURCE_KEY = b"crumbl_source_fingerprint"
+
+CHUNK_ROWS = 500_000
+
+# Outlier points kept per (flavor, weather) box plot; whiskers summarize the rest.
+BOX_MAX_OUTLIERS = 100
+
+
+def data_fingerprint(path=DATA_PATH):
+    """Cache key for a data file: its absolute path plus (mtime_ns, size)."""
+    return (os.path.abspath(path),) + file_fingerprint(path)
+
+
+def cache_path(path, cache):
+    return path + CACHE_FORMATS[cache]
+
+
+def source_metadata(path):
+    """Arrow schema metadata recording which version of ``path`` a cache was built from."""
+    return {SOURCE_KEY: json.dumps(list(file_fingerprint(path))).encode()}
+
+
+def _cached_source(cached, cache):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if cache == "feather":
+        with pa.memory_map(cached) as source:
+            schema = pa.ipc.open_file(source).schema
+    else:
+        schema = pq.read_schema(cached)
+    return (schema.metadata or {}).get(SOURCE_KEY)
+
+
+def _read_cache(path, cache):
+    cached = cache_path(path, cache)
+    try:
+        # Exact (mtime_ns, size) match: a replaced CSV with an older mtime
+        # (cp -p, rsync -t, git checkout) must not be served from a stale cache.
+        if _cached_source(cached, cache) != source_metadata(path)[SOURCE_KEY]:
+            return None
+    except FileNotFoundError:
+        return None
+    if cache == "feather":
+        df = pd.read_feather(cached)
+    else:
+        df = pd.read_parquet(cached)
+    # ingest_sales() writes the store with plain string columns.
+    return df.astype({c: t for c, t in SALES_SCHEMA.items() if t == "category" and c in df.columns})
+
+
+def _write_cache(df, cache_file, cache, metadata):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    tmp = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        if cache == "feather":
+            feather.write_feather(table, tmp)
+        else:
+            pq.write_table(table, tmp)
+        os.replace(tmp, cache_file)
+    except OSError:
+        # A read-only deployment just loses the cache, not the data.
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read_sales_csv(path=DATA_PATH):
+    """Read the sales CSV with the declared ``SALES_SCHEMA`` dtypes."""
+    return pd.read_csv(path, dtype=SALES_SCHEMA)
+
+
+def read_sales(path=DATA_PATH, cache=None):
+    """Load the sales history with typed columns and ``units_sold`` as the target.
+
+    ``cache`` may be ``"parquet"`` or ``"feather"`` to read from / write to a
+    columnar copy next to the CSV; it is rebuilt whenever the CSV's
+    (mtime_ns, size) differs from the one recorded in the cache.
+    """
+    df = _read_cache(path, cache) if cache else None
+    if df is not None:
+        return df
+
+    # Fingerprint before reading, so a CSV replaced mid-read leaves a stale tag.
+    metadata = source_metadata(path)
+    df = read_sales_csv(path)
+    if 'sales' in df.columns:
+        df = df.rename(columns={'sales': 'units_sold'})
+    elif 'units_sold' not in df.columns:
+        df['units_sold'] = np.random.randint(50, 200, size=len(df)).astype(np.int32)
+
+    if cache:
+        _write_cache(df, cache_path(path, cache), cache, metadata)
+    return df
+
+
+@dataclass
+class SalesAggregates:
+    flavors: list
+    weathers: list
+    locations: list
+    flavor_mean: pd.Series
+    flavor_week: dict
+    flavor_location: dict
+    flavor_weather_box: pd.DataFrame
+    sales_sketches: dict  # (flavor, weather, location) -> QuantileSketch of units sold
+    flavor_rows: object  # flavor -> rows; a dict, a *StoreRows reading the columnar store, or None
+    columns: list
+    sample: pd.DataFrame
+    row_count: int
+
+    def weekly(self, flavor):
+        """Mean units sold per week for ``flavor`` (columns: week, units_sold)."""
+        return self.flavor_week.get(flavor)
+
+    def by_location(self, flavor):
+        """Mean units sold per location for ``flavor`` (columns: location, units_sold)."""
+        return self.flavor_location[flavor]
+
+    def box_stats(self, flavor):
+        """Box plot statistics per weather for ``flavor`` (one row per weather)."""
+        return self.flavor_weather_box.loc[flavor].reset_index()
+
+    def sales_quantiles(self, qs, flavor=None, weather=None, location=None):
+        """Approximate units-sold quantiles over the cells matching the filters."""
+        cells = [
+            sketch for (f, w, loc), sketch in self.sales_sketches.items()
+            if flavor in (None, f) and weather in (None, w) and location in (None, loc)
+        ]
+        return merged(cells).quantiles(qs)
+
+    def rows(self, flavor):
+        if self.flavor_rows is None:
+            raise ValueError("raw rows were not kept; ingest with a store_format to keep them")
+        return self.flavor_rows[flavor]
+
+
+class StoreRows:
+    """Per-flavor rows read on demand from the on-disk Parquet store."""
+
+    def __init__(self, path, columns=('weather', 'units_sold')):
+        self.path = path
+        self.columns = list(columns)
+
+    def __getitem__(self, flavor):
+        return pd.read_parquet(self.path, columns=self.columns, filters=[('flavor', '==', flavor)])
+
+
+class MappedStoreRows:
+    """Per-flavor rows filtered from a memory-mapped Arrow IPC store.
+
+    The table is opened once with zero-copy reads, so it lives in the OS page
+    cache shared by every session and worker process. Lookups are
+    copy-on-filter: only the selected flavor's rows are materialized.
+    """
+
+    def __init__(self, path, columns=('weather', 'units_sold')):
+        import pyarrow as pa
+
+        self.path = path
+        self.columns = list(columns)
+        self.table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+    def __getitem__(self, flavor):
+        import pyarrow.compute as pc
+
+        mask = pc.equal(self.table['flavor'], flavor)
+        return self.table.select(self.columns).filter(mask).to_pandas()
+
+
+def _str_keys(grouped, keys):
+    """Group keys as plain strings (categorical levels differ between chunks)."""
+    grouped = grouped.reset_index()
+    for key in keys:
+        if key != 'week':
+            grouped[key] = grouped[key].astype(str)
+    return grouped.set_index(keys)
+
+
+def _merge_hist(a, b):
+    """Add two (offset, counts) integer histograms."""
+    if a is None:
+        return b
+    lo = min(a[0], b[0])
+    hi = max(a[0] + len(a[1]), b[0] + len(b[1]))
+    counts = np.zeros(hi - lo, dtype=np.int64)
+    for offset, c in (a, b):
+        counts[offset - lo:offset - lo + len(c)] += c
+    return lo, counts
+
+
+def _hist_quantiles(hist, qs):
+    """Exact quantiles from an integer histogram.
+
+    Interpolates at rank ``n * q - 0.5`` (clamped), plotly.js'
+    ``quartilemethod="linear"`` used by ``px.box``.
+    """
+    offset, counts = hist
+    cum = np.cumsum(counts)
+    n = int(cum[-1])
+    h = np.clip(n * np.asarray(qs) - 0.5, 0, n - 1)
+    lo = np.floor(h).astype(np.int64)
+    hi = np.minimum(lo + 1, n - 1)
+    v_lo = offset + np.searchsorted(cum, lo, side='right')
+    v_hi = offset + np.searchsorted(cum, hi, side='right')
+    return v_lo + (h - lo) * (v_hi - v_lo)
+
+
+def _hist_box(hist, max_outliers=BOX_MAX_OUTLIERS):
+    """Tukey box plot statistics from an integer histogram.
+
+    Whiskers end at the most extreme values within 1.5 IQR of the quartiles.
+    Values beyond them are outliers, thinned evenly (extremes kept) to
+    ``max_outliers`` points.
+    """
+    offset, counts = hist
+    # Same quartiles plotly.js would compute from the raw rows.
+    q1, median, q3 = _hist_quantiles(hist, [0.25, 0.5, 0.75])
+    present = np.nonzero(counts)[0]
+    values = offset + present
+    iqr = q3 - q1
+    inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)
+    outliers = np.repeat(values[~inside], counts[present[~inside]])
+    if len(outliers) > max_outliers:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype(np.int64)]
+    n = int(counts.sum())
+    return {
+        'q1': float(q1), 'median': float(median), 'q3': float(q3),
+        'lowerfence': int(values[inside].min()), 'upperfence': int(values[inside].max()),
+        'mean': float((values * counts[present]).sum() / n), 'count': n,
+        'outliers': outliers,
+    }
+
+
+class SalesAccumulator:
+    """Incrementally maintained dashboard aggregates.
+
+    ``update`` folds in one chunk of rows (sums and counts per grouping, an
+    integer histogram of units sold per flavor x weather and a quantile sketch
+    per flavor x weather x location), so memory depends on the number of
+    groups, not rows. Accumulators built over separate partitions combine with
+    ``merge``. ``finalize`` produces ``SalesAggregates``.
+    """
+
+    GROUPINGS = {
+        'flavor': ['flavor'],
+        'flavor_week': ['flavor', 'week'],
+        'flavor_location': ['flavor', 'location'],
+    }
+    SKETCH_KEYS = ['flavor', 'weather', 'location']
+
+    def __init__(self):
+        self.totals = {}
+        self.weather_hist = {}
+        self.sketches = {}
+        self.row_count = 0
+        self.columns = None
+        self.sample = None
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = chunk.columns.tolist()
+            self.sample = chunk.head(3).copy()
+        self.row_count += len(chunk)
+
+        for name, keys in self.GROUPINGS.items():
+            if not set(keys) <= set(chunk.columns):
+                continue
+            grouped = _str_keys(chunk.groupby(keys, observed=True)['units_sold'].agg(['sum', 'count']), keys)
+            previous = self.totals.get(name)
+            self.totals[name] = grouped if previous is None else previous.add(grouped, fill_value=0)
+
+        for (flavor, weather), values in chunk.groupby(['flavor', 'weather'], observed=True)['units_sold']:
+            values = values.to_numpy(dtype=np.int64)
+            offset = int(values.min())
+            key = (str(flavor), str(weather))
+            self.weather_hist[key] = _merge_hist(self.weather_hist.get(key), (offset, np.bincount(values - offset)))
+
+        if set(self.SKETCH_KEYS) <= set(chunk.columns):
+            for key, values in chunk.groupby(self.SKETCH_KEYS, observed=True)['units_sold']:
+                key = tuple(str(k) for k in key)
+                if key not in self.sketches:
+                    self.sketches[key] = QuantileSketch()
+                self.sketches[key].update(values.to_numpy())
+        return self
+
+    def merge(self, other):
+        """Fold in an accumulator built over another partition (files, stores, workers)."""
+        if self.columns is None:
+            self.columns, self.sample = other.columns, other.sample
+        self.row_count += other.row_count
+        for name, totals in other.totals.items():
+            previous = self.totals.get(name)
+            self.totals[name] = totals if previous is None else previous.add(totals, fill_value=0)
+        for key, hist in other.weather_hist.items():
+            self.weather_hist[key] = _merge_hist(self.weather_hist.get(key), hist)
+        for key, sketch in other.sketches.items():
+            if key not in self.sketches:
+                self.sketches[key] = QuantileSketch()
+            self.sketches[key].merge(sketch)
+        return self
+
+    def _means(self, name):
+        totals = self.totals[name]
+        return (totals['sum'] / totals['count']).rename('units_sold')
+
+    def finalize(self, flavor_rows):
+        keys = sorted(self.weather_hist)
+        box = pd.DataFrame(
+            [_hist_box(self.weather_hist[k]) for k in keys],
+            index=pd.MultiIndex.from_tuples(keys, names=['flavor', 'weather']),
+        )
+
+        flavor_week = {}
+        if 'flavor_week' in self.totals:
+            flavor_week = _split_by_flavor(self._means('flavor_week').reset_index().sort_values(['flavor', 'week']))
+        by_location = self._means('flavor_location').reset_index().sort_values(['flavor', 'location'])
+
+        return SalesAggregates(
+            flavors=sorted(self.totals['flavor'].index),
+            weathers=sorted({w for _, w in keys}),
+            locations=sorted(set(by_location['location'])),
+            flavor_mean=self._means('flavor'),
+            flavor_week=flavor_week,
+            flavor_location=_split_by_flavor(by_location),
+            flavor_weather_box=box,
+            sales_sketches=self.sketches,
+            flavor_rows=flavor_rows,
+            columns=self.columns,
+            sample=self.sample,
+            row_count=self.row_count,
+        )
+
+
+def _split_by_flavor(frame):
+    return {
+        flavor: group.drop(columns='flavor').reset_index(drop=True)
+        for flavor, group in frame.groupby('flavor', sort=True, observed=True)
+    }
+
+
+def build_aggregates(df):
+    """Compute every grouped statistic the dashboard reads from an in-memory frame."""
+    flavor_rows = {str(flavor): group for flavor, group in df.groupby('flavor', observed=True)}
+    return SalesAccumulator().update(df).finalize(flavor_rows)
+
+
+class _ParquetStoreWriter:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, table):
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class _ArrowStoreWriter:
+    def __init__(self, path):
+        self.path = path
+        self.sink = None
+        self.writer = None
+
+    def write(self, table):
+        import pyarrow as pa
+
+        if self.writer is None:
+            self.sink = pa.OSFile(self.path, "wb")
+            self.writer = pa.ipc.new_file(self.sink, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.sink.close()
+            self.writer = None
+
+
+STORE_FORMATS = {
+    "parquet": (".parquet", _ParquetStoreWriter, StoreRows),
+    "arrow": (".arrow", _ArrowStoreWriter, MappedStoreRows),
+}
+
+
+def _sales_chunks(path, chunk_rows):
+    for chunk in pd.read_csv(path, dtype=SALES_SCHEMA, chunksize=chunk_rows):
+        if 'sales' in chunk.columns:
+            chunk = chunk.rename(columns={'sales': 'units_sold'})
+        elif 'units_sold' not in chunk.columns:
+            raise ValueError(f"{path} has no sales/units_sold column")
+        yield chunk
+
+
+def ingest_sales(path=DATA_PATH, store_path=None, chunk_rows=CHUNK_ROWS, store_format="arrow"):
+    """Stream a sales CSV in chunks into aggregates plus an on-disk columnar store.
+
+    Only the aggregates stay in memory; per-flavor rows (for the box plot) are
+    read back from the store (default: next to the CSV) on demand. With
+    ``store_format="arrow"`` the store is an Arrow IPC file that is memory
+    mapped, so every session and process shares one copy in the page cache;
+    ``"parquet"`` writes the same file ``read_sales(cache="parquet")`` reuses.
+    With ``store_format=None`` no store is written and ``rows()`` is
+    unavailable; the dashboard charts only need the aggregates.
+    """
+    if store_format is None:
+        accumulator = SalesAccumulator()
+        for chunk in _sales_chunks(path, chunk_rows):
+            accumulator.update(chunk)
+        return accumulator.finalize(None)
+
+    import pyarrow as pa
+
+    suffix, writer_cls, rows_cls = STORE_FORMATS[store_format]
+    store_path = store_path or path + suffix
+    tmp = f"{store_path}.{os.getpid()}.tmp"
+    metadata = source_metadata(path)
+    accumulator = SalesAccumulator()
+    writer = writer_cls(tmp)
+    try:
+        for chunk in _sales_chunks(path, chunk_rows):
+            accumulator.update(chunk)
+
+            # Categories differ chunk to chunk; both formats dictionary-encode or
+            # compare plain strings fine, and this keeps one schema for the file.
+            categorical = [c for c in chunk.columns if isinstance(chunk[c].dtype, pd.CategoricalDtype)]
+            table = pa.Table.from_pandas(chunk.astype({c: str for c in categorical}), preserve_index=False)
+            # Tagged like read_sales' cache so the Parquet store is reused as one.
+            writer.write(table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata}))
+        writer.close()
+        os.replace(tmp, store_path)
+    finally:
+        writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return accumulator.finalize(rows_cls(store_path))
@@ -0,0 +1,135 @@
+"""Scenario -> model feature encoding, shared by the UI, batch API and training.
+
+A scenario is a ``(flavor, weather, location, holiday, social_mentions)`` tuple,
+the same inputs the Streamlit sidebar collects. ``FeatureEncoder`` compiles
+``feature_columns.pkl`` once into column positions (including a
+category -> column map per one-hot field) and writes rows straight into a
+NumPy buffer. Categories the model was not trained on raise
+``UnknownCategoryError`` instead of silently encoding as all zeros.
+"""
+import joblib
+import numpy as np
+import pandas as pd
+
+SCENARIO_FIELDS = ("flavor", "weather", "location", "holiday", "social_media_mentions")
+
+# Prefix in feature_columns for each categorical scenario field.
+CATEGORICAL_PREFIXES = {"flavor": "flavor_", "weather": "weather_", "location": "location_"}
+
+TRUE_MARKERS = ("yes", "true", "1")
+
+
+class UnknownCategoryError(ValueError):
+    def __init__(self, field_name, values, known):
+        self.field_name = field_name
+        self.values = list(values)
+        self.known = list(known)
+        super().__init__(f"unknown {field_name} {self.values}; the model knows {self.known}")
+
+
+def holiday_flags(values):
+    """Coerce holiday markers (bools, 0/1, or the CSV's "Yes"/"No") to 0/1 ints."""
+    values = np.asarray(values)
+    if values.dtype.kind in "OUS":
+        return np.isin(np.char.lower(values.astype(str)), TRUE_MARKERS).astype(np.int8)
+    return (values != 0).astype(np.int8)
+
+
+def holiday_flag(value):
+    """Scalar version of ``holiday_flags``."""
+    if isinstance(value, str):
+        return int(value.strip().lower() in TRUE_MARKERS)
+    return int(bool(value))
+
+
+def scenario_columns(scenarios):
+    """Split scenarios into one array per field.
+
+    Accepts an iterable of tuples ordered like ``SCENARIO_FIELDS`` or a DataFrame
+    that has those columns.
+    """
+    if isinstance(scenarios, pd.DataFrame):
+        return {name: scenarios[name].to_numpy() for name in SCENARIO_FIELDS}
+    rows = list(scenarios)
+    if not rows:
+        return {name: np.empty(0, dtype=object) for name in SCENARIO_FIELDS}
+    return {name: np.asarray(col) for name, col in zip(SCENARIO_FIELDS, zip(*rows))}
+
+
+class FeatureEncoder:
+    def __init__(self, feature_columns):
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+        position = {name: i for i, name in enumerate(self.feature_columns)}
+        self.holiday_col = position.get("holiday")
+        self.mentions_col = position.get("social_media_mentions")
+        self.category_position = {
+            field_name: {
+                name[len(prefix):]: i for name, i in position.items() if name.startswith(prefix)
+            }
+            for field_name, prefix in CATEGORICAL_PREFIXES.items()
+        }
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(joblib.load(path))
+
+    def categories(self, field_name):
+        """Category values the model knows for a one-hot field, in feature order."""
+        return list(self.category_position[field_name])
+
+    def _column(self, field_name, value):
+        try:
+            return self.category_position[field_name][value]
+        except KeyError:
+            raise UnknownCategoryError(field_name, [value], self.categories(field_name)) from None
+
+    def check(self, scenario):
+        """Raise ``UnknownCategoryError`` if any category in ``scenario`` is unknown."""
+        for field_name, value in zip(SCENARIO_FIELDS[:3], scenario):
+            self._column(field_name, str(value))
+
+    def encode_row(self, flavor, weather, location, holiday, mentions, out=None):
+        """Encode one scenario into a 1-D float buffer (zeroed first)."""
+        if out is None:
+            out = np.zeros(self.n_features)
+        else:
+            out[:] = 0.0
+        if self.holiday_col is not None:
+            out[self.holiday_col] = holiday_flag(holiday)
+        if self.mentions_col is not None:
+            out[self.mentions_col] = mentions
+        for field_name, value in (("flavor", flavor), ("weather", weather), ("location", location)):
+            out[self._column(field_name, str(value))] = 1.0
+        return out
+
+    def encode(self, scenarios, out=None):
+        """Encode many scenarios into an ``(n_rows, n_features)`` float matrix."""
+        columns = scenario_columns(scenarios)
+        n_rows = len(columns["flavor"])
+        if out is None:
+            X = np.zeros((n_rows, self.n_features))
+        else:
+            X = out[:n_rows]
+            X[:] = 0.0
+
+        if self.holiday_col is not None:
+            X[:, self.holiday_col] = holiday_flags(columns["holiday"])
+        if self.mentions_col is not None:
+            X[:, self.mentions_col] = columns["social_media_mentions"]
+
+        rows = np.arange(n_rows)
+        for field_name, lookup in self.category_position.items():
+            # Resolve each distinct category once, then scatter the 1s in one step.
+            uniques, inverse = np.unique(columns[field_name].astype(str), return_inverse=True)
+            unknown = [str(u) for u in uniques if u not in lookup]
+            if unknown:
+                raise UnknownCategoryError(field_name, unknown, lookup)
+            targets = np.array([lookup[u] for u in uniques], dtype=np.intp)
+            X[rows, targets[inverse]] = 1.0
+        return X
+
+
+def feature_encoder(loaded):
+    """The encoder for a ``LoadedModel``, built once per model version."""
+    return loaded.derive("feature_encoder", lambda lm: FeatureEncoder(lm.feature_columns))
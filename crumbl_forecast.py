@@ -0,0 +1,120 @@
+"""Headless batch forecasting from the command line.
+
+    python crumbl_forecast.py --input scenarios.csv --output forecasts.parquet
+
+The input CSV needs the scenario columns ``flavor``, ``weather``, ``location``,
+``holiday`` and ``social_media_mentions`` (the same names as
+``crumbl_mock_data.csv``); any other columns are passed through. The file is
+streamed in chunks through ``predict_batch`` and written to Parquet or CSV
+depending on the output extension. Nothing here imports Streamlit or Plotly.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from crumbl_features import SCENARIO_FIELDS
+from crumbl_model import SERVING_FEATURES_PATH, SERVING_MODEL_PATH, get_model
+from crumbl_predict import predict_batch, predict_intervals
+
+PREDICTION_COLUMN = "predicted_units_sold"
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+def open_sink(path):
+    if path.endswith(".csv"):
+        return _CsvSink(path)
+    return _ParquetSink(path)
+
+
+def forecast_file(input_path, output_path, chunk_size=100_000, loaded=None, interval=False):
+    """Stream ``input_path`` through the batch predictor; return the row count."""
+    loaded = loaded or get_model()
+    sink = open_sink(output_path)
+    rows = 0
+    try:
+        reader = pd.read_csv(input_path, chunksize=chunk_size, dtype={"store_id": str})
+        for chunk in reader:
+            missing = [name for name in SCENARIO_FIELDS if name not in chunk.columns]
+            if missing:
+                raise ValueError(f"{input_path} is missing scenario columns: {missing}")
+            if interval:
+                band = predict_intervals(chunk, loaded)
+                chunk[PREDICTION_COLUMN] = band["prediction"]
+                chunk[PREDICTION_COLUMN + "_lower"] = band["lower"]
+                chunk[PREDICTION_COLUMN + "_upper"] = band["upper"]
+            else:
+                chunk[PREDICTION_COLUMN] = predict_batch(chunk, loaded)
+            sink.write(chunk)
+            rows += len(chunk)
+    finally:
+        sink.close()
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="crumbl-forecast", description="Batch Crumbl sales forecasts.")
+    parser.add_argument("--input", required=True, help="Scenario CSV to score")
+    parser.add_argument("--output", required=True, help="Output .parquet or .csv path")
+    parser.add_argument("--model", default=SERVING_MODEL_PATH,
+                        help="Pickled model, or a .forest artifact from crumbl_artifact.py (no sklearn import)")
+    parser.add_argument("--features", default=SERVING_FEATURES_PATH, help="Pickled feature_columns path")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per streamed chunk")
+    parser.add_argument("--interval", action="store_true",
+                        help="Also write 10th/90th percentile bands from the individual trees")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start = time.perf_counter()
+    loaded = get_model(args.model, args.features)
+    try:
+        rows = forecast_file(args.input, args.output, args.chunk_size, loaded, args.interval)
+    except ValueError as e:
+        # Bad input (missing columns, unknown categories): no partial output.
+        if os.path.exists(args.output):
+            os.remove(args.output)
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"Forecast {rows:,} scenarios -> {args.output} in {elapsed:.2f}s "
+          f"(model load {loaded.load_seconds:.2f}s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Flat, array-backed inference for the RandomForestRegressor.
+
+``RandomForestRegressor.predict`` pays input validation, DataFrame conversion
+and joblib dispatch on every call, which dominates single-row forecasts. Here
+every tree in ``estimators_`` is exported into one set of contiguous arrays
+(feature, threshold, children, value) and all trees are walked together, one
+depth level per NumPy step.
+
+Check parity with sklearn on the mock dataset with::
+
+    python crumbl_forest.py
+"""
+import sys
+import time
+
+import numpy as np
+
+from crumbl_model import get_model
+
+# Rows per chunk in predict(); bounds the (rows x trees) node-index buffers.
+PREDICT_CHUNK_ROWS = 8192
+
+
+def float32_floor(values):
+    """Largest float32 at or below each value.
+
+    For float32 ``x``, ``x > t`` and ``x > float32_floor(t)`` always agree, so
+    split thresholds can be stored in float32 without changing any prediction.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = values.astype(np.float32)
+    return np.where(out > values, np.nextafter(out, np.float32(-np.inf)), out)
+
+
+class CompiledForest:
+    """All trees of a fitted forest as flat node tables.
+
+    Node ``i`` sends a row to ``children[2 * i + (x[feature[i]] > threshold[i])]``.
+    Leaves point both children back at themselves, so every tree can be stepped
+    ``depth`` times without masking and ends on its leaf.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+
+    @classmethod
+    def from_model(cls, model):
+        trees = [est.tree_ for est in model.estimators_]
+        counts = np.array([t.node_count for t in trees])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        total = int(counts.sum())
+
+        feature = np.zeros(total, dtype=np.intp)
+        threshold = np.zeros(total, dtype=np.float64)
+        children = np.zeros(2 * total, dtype=np.intp)
+        value = np.zeros(total, dtype=np.float64)
+
+        for tree, offset in zip(trees, offsets):
+            n = tree.node_count
+            nodes = np.arange(offset, offset + n)
+            is_leaf = tree.children_left == -1
+            left = np.where(is_leaf, nodes, tree.children_left + offset)
+            right = np.where(is_leaf, nodes, tree.children_right + offset)
+
+            feature[offset:offset + n] = np.where(is_leaf, 0, tree.feature)
+            threshold[offset:offset + n] = np.where(is_leaf, np.inf, tree.threshold)
+            children[2 * offset:2 * (offset + n):2] = left
+            children[2 * offset + 1:2 * (offset + n):2] = right
+            value[offset:offset + n] = tree.value.reshape(n)
+
+        depth = max(t.max_depth for t in trees)
+        return cls(feature, threshold, children, value, offsets.astype(np.intp), depth)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.value, self.roots))
+
+    def quantized(self, round_values=True):
+        """Copy with float32 thresholds, int16 leaf values and int32 node indices.
+
+        Thresholds are exact (see ``float32_floor``); leaf values are rounded
+        to whole units, which moves each tree's output by at most 0.5. With
+        ``round_values=False`` leaf values stay float64.
+        """
+        value = self.value
+        if round_values:
+            value = np.round(value)
+            info = np.iinfo(np.int16)
+            if value.min() < info.min or value.max() > info.max:
+                raise ValueError("leaf values do not fit in int16")
+            value = value.astype(np.int16)
+        return CompiledForest(
+            self.feature.astype(np.int16), float32_floor(self.threshold), self.children.astype(np.int32),
+            value, self.roots.astype(np.int32), self.depth,
+        )
+
+    def leaves(self, X):
+        """Leaf node index reached in every tree, shape ``(n_rows, n_trees)``."""
+        # sklearn compares float32 inputs against float64 thresholds; match it exactly.
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.depth):
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+        return node
+
+    def tree_predictions(self, X):
+        """Per-tree outputs, shape ``(n_rows, n_trees)``."""
+        return self.value[self.leaves(X)]
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            return np.array([self.predict_row(X)])
+        out = np.empty(len(X))
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            chunk = X[start:start + PREDICT_CHUNK_ROWS]
+            out[start:start + len(chunk)] = self.tree_predictions(chunk).mean(axis=1)
+        return out
+
+    def predict_quantiles(self, X, quantiles):
+        """Forest mean plus quantiles of the per-tree outputs, chunk by chunk.
+
+        Returns ``(mean, q)`` with ``q`` shaped ``(n_rows, len(quantiles))``.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        mean = np.empty(len(X))
+        q = np.empty((len(X), len(quantiles)))
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            per_tree = self.tree_predictions(X[start:start + PREDICT_CHUNK_ROWS])
+            mean[start:start + len(per_tree)] = per_tree.mean(axis=1)
+            q[start:start + len(per_tree)] = np.quantile(per_tree, quantiles, axis=1).T
+        return mean, q
+
+    def predict_row(self, x):
+        """Forecast for one encoded row without any 2-D bookkeeping."""
+        x = np.asarray(x, dtype=np.float32)
+        node = self.roots
+        for _ in range(self.depth):
+            node = self.children[2 * node + (x[self.feature[node]] > self.threshold[node])]
+        return float(self.value[node].mean())
+
+
+def compiled_forest(loaded):
+    # Memory-mapped artifacts (crumbl_artifact) arrive already compiled.
+    return loaded.derive(
+        "compiled_forest", lambda lm: getattr(lm.model, "compiled", None) or CompiledForest.from_model(lm.model)
+    )
+
+
+def check_parity(loaded=None, data_path="crumbl_mock_data.csv"):
+    """Compare the compiled forest against ``model.predict`` on a scenario CSV.
+
+    Returns ``(max_abs_error, sklearn_row_seconds, compiled_row_seconds)``.
+    """
+    import pandas as pd
+
+    from crumbl_features import feature_encoder
+
+    loaded = loaded or get_model()
+    forest = compiled_forest(loaded)
+    X = feature_encoder(loaded).encode(pd.read_csv(data_path))
+
+    expected = loaded.model.predict(pd.DataFrame(X, columns=loaded.feature_columns))
+    max_error = float(np.abs(forest.predict(X) - expected).max())
+
+    row = pd.DataFrame(X[:1], columns=loaded.feature_columns)
+    start = time.perf_counter()
+    for _ in range(20):
+        loaded.model.predict(row)
+    sklearn_seconds = (time.perf_counter() - start) / 20
+    start = time.perf_counter()
+    for _ in range(1000):
+        forest.predict_row(X[0])
+    compiled_seconds = (time.perf_counter() - start) / 1000
+    return max_error, sklearn_seconds, compiled_seconds
+
+
+if __name__ == "__main__":
+    max_error, sklearn_seconds, compiled_seconds = check_parity()
+    print(f"max |compiled - sklearn| = {max_error:.3g}")
+    print(f"single row: sklearn {sklearn_seconds * 1e6:,.0f} us, compiled {compiled_seconds * 1e6:,.1f} us")
+    sys.exit(0 if max_error < 1e-9 else 1)
@@ -0,0 +1,191 @@
+"""Process-wide model registry for the Crumbl sales forecaster.
+
+Streamlit re-executes ``crumbl_app.py`` on every widget change, but imported
+modules stay resident, so a module-level registry survives reruns and is shared
+by every session in the process. Models are keyed by their file paths and
+reloaded only when the files' mtime/size fingerprint changes, which lets a
+retrained ``crumbl_sales_model.pkl`` be hot-swapped without restarting the app.
+A ``.forest`` model path is loaded as a memory-mapped ``crumbl_artifact`` file
+instead of a pickle. The path served by default (app, service, batching) is
+``SERVING_MODEL_PATH``: ``$CRUMBL_MODEL_PATH`` if set, else the pickle.
+"""
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import joblib
+
+MODEL_PATH = "crumbl_sales_model.pkl"
+FEATURES_PATH = "feature_columns.pkl"
+ARTIFACT_SUFFIX = ".forest"
+
+# What get_model() serves. Point it at a .forest artifact so every Streamlit
+# worker and service process maps one shared copy instead of unpickling its own.
+SERVING_MODEL_PATH = os.environ.get("CRUMBL_MODEL_PATH", MODEL_PATH)
+SERVING_FEATURES_PATH = os.environ.get("CRUMBL_FEATURES_PATH", FEATURES_PATH)
+
+# A model/feature pair that disagrees is re-read this many times (a retrain
+# replacing both files) before the load fails.
+PAIR_RETRIES = 3
+PAIR_RETRY_SECONDS = 0.05
+
+
+def file_fingerprint(path):
+    """Cheap change detector for a file: (mtime_ns, size)."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass
+class LoadedModel:
+    model: object
+    feature_columns: list
+    version: str
+    fingerprint: tuple
+    load_seconds: float
+    loaded_at: float
+    derived: dict = field(default_factory=dict, repr=False)
+    # Re-entrant: builders may derive other artifacts (the cube needs the encoder).
+    _derive_lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+    def derive(self, name, builder):
+        """Build ``builder(self)`` once per model version and memoize it under ``name``.
+
+        Used for artifacts computed from the model (lookup tables, compiled
+        trees, encoders); a hot-swapped model gets a fresh entry and rebuilds.
+        """
+        try:
+            return self.derived[name]
+        except KeyError:
+            pass
+        with self._derive_lock:
+            if name not in self.derived:
+                self.derived[name] = builder(self)
+            return self.derived[name]
+
+
+@dataclass
+class RegistryStats:
+    loads: int = 0
+    hits: int = 0
+    swaps: int = 0
+    last_load_seconds: float = 0.0
+    total_load_seconds: float = 0.0
+    last_loaded_at: float = 0.0
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+@dataclass
+class ModelRegistry:
+    _entries: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    stats: RegistryStats = field(default_factory=RegistryStats)
+    # name -> fn(LoadedModel), run after every (re)load to precompute derived artifacts.
+    load_hooks: dict = field(default_factory=dict)
+    # Paths used when get() is called without any.
+    model_path: str = SERVING_MODEL_PATH
+    features_path: str = SERVING_FEATURES_PATH
+
+    def get(self, model_path=None, features_path=None):
+        """Return the loaded model for these paths, reloading if the files changed."""
+        model_path = model_path or self.model_path
+        features_path = features_path or self.features_path
+        key = (os.path.abspath(model_path), os.path.abspath(features_path))
+        fingerprint = _pair_fingerprint(model_path, features_path)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.fingerprint == fingerprint:
+            self.stats.hits += 1
+            return entry
+
+        with self._lock:
+            # Another thread may have finished the reload while we waited.
+            entry = self._entries.get(key)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self.stats.hits += 1
+                return entry
+
+            start = time.perf_counter()
+            model, feature_columns, fingerprint = _load_pair(model_path, features_path, fingerprint)
+            elapsed = time.perf_counter() - start
+
+            new_entry = LoadedModel(
+                model=model,
+                feature_columns=feature_columns,
+                version=_version_for(key, fingerprint),
+                fingerprint=fingerprint,
+                load_seconds=elapsed,
+                loaded_at=time.time(),
+            )
+            for hook in list(self.load_hooks.values()):
+                hook(new_entry)
+            self._entries[key] = new_entry
+
+            self.stats.loads += 1
+            if entry is not None:
+                self.stats.swaps += 1
+            self.stats.last_load_seconds = elapsed
+            self.stats.total_load_seconds += elapsed
+            self.stats.last_loaded_at = new_entry.loaded_at
+            return new_entry
+
+    def add_load_hook(self, name, hook):
+        """Register ``hook`` to run on each model load; re-registering a name replaces it."""
+        self.load_hooks[name] = hook
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            hook(entry)
+
+    def set_default(self, model_path, features_path=None):
+        """Serve ``model_path`` (and ``features_path``) from argument-less ``get()`` calls."""
+        self.model_path = model_path
+        if features_path:
+            self.features_path = features_path
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _pair_fingerprint(model_path, features_path):
+    return file_fingerprint(model_path), file_fingerprint(features_path)
+
+
+def _load_pair(model_path, features_path, fingerprint):
+    """Load model + feature columns, retrying while a retrain is mid-swap.
+
+    A model fitted on different columns than ``features_path`` lists would
+    silently read the wrong positions, so a mismatched pair is never returned.
+    """
+    for attempt in range(PAIR_RETRIES + 1):
+        if model_path.endswith(ARTIFACT_SUFFIX):
+            # Shared page-cache mapping; feature columns come from its header.
+            from crumbl_artifact import load_artifact
+
+            model, feature_columns = load_artifact(model_path)
+        else:
+            model = joblib.load(model_path)
+            feature_columns = list(joblib.load(features_path))
+        trained_on = getattr(model, "feature_names_in_", None)
+        if trained_on is None or list(trained_on) == feature_columns:
+            return model, feature_columns, fingerprint
+        if attempt < PAIR_RETRIES:
+            time.sleep(PAIR_RETRY_SECONDS)
+            fingerprint = _pair_fingerprint(model_path, features_path)
+    raise ValueError(f"{model_path} was trained on different columns than {features_path} lists")
+
+
+def _version_for(key, fingerprint):
+    return hashlib.sha1(repr((key, fingerprint)).encode()).hexdigest()[:12]
+
+
+registry = ModelRegistry()
+
+
+def get_model(model_path=None, features_path=None):
+    return registry.get(model_path, features_path)
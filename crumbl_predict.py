@@ -0,0 +1,187 @@
+"""Vectorized prediction for whole grids of sales scenarios.
+
+Scenarios (see ``crumbl_features``) are one-hot encoded straight into a
+preallocated NumPy matrix ordered by ``feature_columns`` and scored with a
+single ``model.predict`` call.
+"""
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from crumbl_features import CATEGORICAL_PREFIXES, feature_encoder, holiday_flag
+from crumbl_forest import compiled_forest, float32_floor
+from crumbl_model import get_model, registry
+
+# Batches up to this size skip sklearn's fixed per-call overhead and use the
+# compiled forest; larger ones are faster through sklearn's Cython traversal.
+COMPILED_MAX_ROWS = 64
+
+
+def predict_batch(scenarios, loaded=None, engine="auto"):
+    """Predict unit sales for every scenario in one vectorized call.
+
+    ``engine`` is ``"sklearn"``, ``"compiled"`` or ``"auto"`` (compiled forest
+    for batches of at most ``COMPILED_MAX_ROWS``).
+    """
+    loaded = loaded or get_model()
+    X = feature_encoder(loaded).encode(scenarios)
+    if len(X) == 0:
+        return np.empty(0)
+    if engine == "compiled" or (engine == "auto" and len(X) <= COMPILED_MAX_ROWS):
+        return compiled_forest(loaded).predict(X)
+    return loaded.model.predict(pd.DataFrame(X, columns=loaded.feature_columns))
+
+
+# Default prediction band: 10th-90th percentile of the individual trees.
+INTERVAL = (0.1, 0.9)
+
+
+def predict_intervals(scenarios, loaded=None, interval=INTERVAL):
+    """Point forecasts plus a band from the spread of the forest's trees.
+
+    All trees are evaluated together as one stacked ``(rows, trees)`` array by
+    the compiled forest, so the band costs a single vectorized pass. Returns
+    ``{"prediction", "lower", "upper"}`` arrays.
+    """
+    loaded = loaded or get_model()
+    X = feature_encoder(loaded).encode(scenarios)
+    mean, q = compiled_forest(loaded).predict_quantiles(X, interval)
+    return {"prediction": mean, "lower": q[:, 0], "upper": q[:, 1]}
+
+
+# =============================================
+# 🧊 PRECOMPUTED FORECAST CUBE
+# =============================================
+CUBE_MAX_MENTIONS = 100  # upper bound of the sidebar's Social Mentions slider
+
+
+class ForecastCube:
+    """Every (flavor, weather, location, holiday, mentions) forecast in one dense array.
+
+    The one-hot feature space is tiny, so the forest is evaluated once for the
+    whole grid with integer mentions in ``[0, max_mentions]``; lookups inside
+    the grid are an array read instead of a pass over all trees.
+    """
+
+    def __init__(self, loaded, max_mentions=CUBE_MAX_MENTIONS):
+        start = time.perf_counter()
+        self.max_mentions = max_mentions
+        encoder = feature_encoder(loaded)
+        self.axes = {name: encoder.categories(name) for name in CATEGORICAL_PREFIXES}
+        self.index = {name: {v: i for i, v in enumerate(values)} for name, values in self.axes.items()}
+        mentions = range(max_mentions + 1)
+        grid = itertools.product(
+            self.axes["flavor"], self.axes["weather"], self.axes["location"], (0, 1), mentions
+        )
+        shape = (
+            len(self.axes["flavor"]), len(self.axes["weather"]), len(self.axes["location"]), 2, max_mentions + 1
+        )
+        self.values = predict_batch(grid, loaded).reshape(shape)
+        self.build_seconds = time.perf_counter() - start
+
+    def lookup(self, flavor, weather, location, holiday, mentions):
+        """Return the cached forecast, or None if the scenario is outside the grid."""
+        try:
+            f = self.index["flavor"][flavor]
+            w = self.index["weather"][weather]
+            loc = self.index["location"][location]
+        except KeyError:
+            return None
+        if mentions != int(mentions) or not 0 <= mentions <= self.max_mentions:
+            return None
+        return float(self.values[f, w, loc, holiday_flag(holiday), int(mentions)])
+
+
+def forecast_cube(loaded, max_mentions=CUBE_MAX_MENTIONS):
+    return loaded.derive("forecast_cube", lambda lm: ForecastCube(lm, max_mentions))
+
+
+def enable_forecast_cube(target_registry=registry, max_mentions=CUBE_MAX_MENTIONS):
+    """Precompute the forecast cube whenever the registry (re)loads a model."""
+    target_registry.add_load_hook("forecast_cube", lambda lm: forecast_cube(lm, max_mentions))
+
+
+# =============================================
+# 📶 PIECEWISE-CONSTANT MENTIONS TABLE
+# =============================================
+def _float32_probes(cuts):
+    """One float32 value inside each step ``(-inf, c0], (c0, c1], ..., (c_last, inf)``."""
+    if len(cuts) == 0:
+        return np.zeros(1, dtype=np.float32)
+    below = float32_floor(cuts)
+    above = np.float32(cuts[-1])
+    if above <= cuts[-1]:
+        above = np.nextafter(above, np.float32(np.inf))
+    return np.append(below, above)
+
+
+class MentionsStepTable:
+    """Exact forecasts as a step function of ``social_media_mentions``.
+
+    Every other feature is 0/1, so for a fixed (flavor, weather, location,
+    holiday) the forest only changes value where mentions cross one of its
+    split thresholds. Per combination the table keeps the sorted thresholds
+    where the value actually changes plus the value of each step; a lookup is
+    one ``np.searchsorted`` and is exact for any mention count.
+    """
+
+    def __init__(self, loaded):
+        start = time.perf_counter()
+        encoder = feature_encoder(loaded)
+        forest = compiled_forest(loaded)
+        split = np.isfinite(forest.threshold)
+        on_mentions = split & (forest.feature == encoder.mentions_col)
+        other = forest.threshold[split & ~on_mentions]
+        if not np.all((other >= 0) & (other < 1)):
+            raise ValueError("MentionsStepTable needs every feature except social_media_mentions to be 0/1")
+
+        # sklearn sends a row right when float32(x) > threshold, so the number of
+        # thresholds strictly below float32(x) is the step index.
+        cuts = np.unique(forest.threshold[on_mentions])
+        probes = _float32_probes(cuts)
+        axes = [encoder.categories(name) for name in CATEGORICAL_PREFIXES]
+        combos = list(itertools.product(*axes, (0, 1)))
+        X = encoder.encode([combo + (m,) for combo in combos for m in probes])
+        steps = forest.predict(X).reshape(len(combos), len(probes))
+
+        self.steps = {}  # (flavor, weather, location, holiday) -> (breaks, values)
+        for combo, row in zip(combos, steps):
+            changes = np.flatnonzero(np.diff(row) != 0)
+            self.steps[combo] = (cuts[changes], row[np.concatenate(([0], changes + 1))])
+        self.build_seconds = time.perf_counter() - start
+
+    @property
+    def nbytes(self):
+        return sum(breaks.nbytes + values.nbytes for breaks, values in self.steps.values())
+
+    def lookup(self, flavor, weather, location, holiday, mentions):
+        """Return the forecast, or None if a category is not in the model."""
+        step = self.steps.get((flavor, weather, location, holiday_flag(holiday)))
+        if step is None:
+            return None
+        breaks, values = step
+        return float(values[breaks.searchsorted(np.float32(mentions))])
+
+
+def step_table(loaded):
+    return loaded.derive("step_table", MentionsStepTable)
+
+
+def enable_step_table(target_registry=registry):
+    """Compile the mentions step table whenever the registry (re)loads a model."""
+    target_registry.add_load_hook("step_table", step_table)
+
+
+def predict_one(flavor, weather, location, holiday, mentions, loaded=None):
+    """Single-scenario forecast, served from the step table or cube when built."""
+    loaded = loaded or get_model()
+    for name in ("step_table", "forecast_cube"):
+        table = loaded.derived.get(name)
+        if table is not None:
+            value = table.lookup(flavor, weather, location, holiday, mentions)
+            if value is not None:
+                return value
+    x = feature_encoder(loaded).encode_row(flavor, weather, location, holiday, mentions)
+    return compiled_forest(loaded).predict_row(x)
@@ -0,0 +1,134 @@
+"""HTTP prediction service next to the Streamlit UI.
+
+    python crumbl_service.py --port 8000
+
+    POST /predict        {"flavor": "Oreo", "weather": "Sunny", "location": "Utah",
+                          "holiday": true, "social_media_mentions": 40}
+    POST /predict/batch  {"scenarios": [{...}, ...], "interval": false}
+                         with "interval": true also returns per-tree "lower"/"upper" bands
+    GET  /health
+    GET  /metrics        Prometheus text (stage latencies, batcher and cache counters)
+
+Single predictions are answered from the shared prediction cache when
+possible; misses from concurrent requests are coalesced by a
+``MicroBatcher`` into one ``model.predict``; batch requests go straight to
+``predict_batch``. Both use the process-wide model registry, so the model is
+loaded once and hot-swapped when the file changes. ``--model`` (or
+``$CRUMBL_MODEL_PATH``) pointing at a ``.forest`` artifact makes every service
+process share one memory-mapped copy of the forest.
+"""
+import argparse
+import math
+import sys
+
+from flask import Flask, jsonify, request
+
+from crumbl_batching import MicroBatcher
+from crumbl_cache import prediction_cache, scenario_key
+from crumbl_features import SCENARIO_FIELDS, UnknownCategoryError, feature_encoder
+from crumbl_model import SERVING_FEATURES_PATH, SERVING_MODEL_PATH, get_model, registry
+from crumbl_predict import predict_batch, predict_intervals
+from crumbl_timing import span, timings
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_scenario(payload):
+    """Turn a JSON object into a scenario tuple ordered like ``SCENARIO_FIELDS``."""
+    if not isinstance(payload, dict):
+        raise BadRequest("scenario must be a JSON object")
+    missing = [name for name in SCENARIO_FIELDS if name not in payload]
+    if missing:
+        raise BadRequest(f"missing fields: {missing}")
+    try:
+        mentions = float(payload["social_media_mentions"])
+    except (TypeError, ValueError):
+        raise BadRequest("social_media_mentions must be a number")
+    if not math.isfinite(mentions):
+        raise BadRequest("social_media_mentions must be finite")
+    return (
+        str(payload["flavor"]),
+        str(payload["weather"]),
+        str(payload["location"]),
+        payload["holiday"],
+        mentions,
+    )
+
+
+def create_app(batcher=None):
+    app = Flask(__name__)
+    app.config["batcher"] = batcher or MicroBatcher()
+
+    @app.errorhandler(BadRequest)
+    @app.errorhandler(UnknownCategoryError)
+    def bad_request(e):
+        return jsonify(error=str(e)), 400
+
+    @app.post("/predict")
+    def predict():
+        with span("service_predict"):
+            scenario = parse_scenario(request.get_json(silent=True))
+            loaded = get_model()
+            # Reject unknown categories here so one bad request cannot fail a whole batch.
+            feature_encoder(loaded).check(scenario)
+            version = loaded.version
+            key = scenario_key(*scenario)
+            prediction = prediction_cache.get(key, version)
+            if prediction is None:
+                prediction = app.config["batcher"].predict(scenario)
+                prediction_cache.put(key, version, prediction)
+        return jsonify(prediction=prediction, model_version=version)
+
+    @app.post("/predict/batch")
+    def predict_many():
+        with span("service_predict_batch"):
+            payload = request.get_json(silent=True)
+            scenarios = payload.get("scenarios") if isinstance(payload, dict) else None
+            if not isinstance(scenarios, list):
+                raise BadRequest("expected {\"scenarios\": [...]}")
+            loaded = get_model()
+            parsed = [parse_scenario(s) for s in scenarios]
+            if payload.get("interval"):
+                band = predict_intervals(parsed, loaded)
+                return jsonify(
+                    predictions=band["prediction"].tolist(),
+                    lower=band["lower"].tolist(),
+                    upper=band["upper"].tolist(),
+                    model_version=loaded.version,
+                )
+            predictions = predict_batch(parsed, loaded)
+        return jsonify(predictions=[float(p) for p in predictions], model_version=loaded.version)
+
+    @app.get("/health")
+    def health():
+        return jsonify(status="ok", model_version=get_model().version)
+
+    @app.get("/metrics")
+    def metrics():
+        body = timings.prometheus_text() + app.config["batcher"].prometheus_text()
+        cache = prediction_cache.stats()
+        body += "".join(f"crumbl_prediction_cache_{name} {cache[name]}\n"
+                        for name in ("entries", "hits", "misses", "evictions", "invalidations"))
+        return body, 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Crumbl sales forecasts over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=SERVING_MODEL_PATH,
+                        help="Pickled model or a memory-mapped .forest artifact (default: $CRUMBL_MODEL_PATH)")
+    parser.add_argument("--features", default=SERVING_FEATURES_PATH)
+    args = parser.parse_args(argv)
+    registry.set_default(args.model, args.features)
+    get_model()  # load before taking traffic
+    create_app().run(host=args.host, port=args.port, threaded=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Mergeable streaming quantile sketch (KLL).
+
+``QuantileSketch`` keeps a stack of compactors: level ``h`` holds items that
+each stand for ``2**h`` inputs. When a level outgrows its capacity it is
+sorted and every other item (random offset) is promoted to the next level,
+so memory stays O(k log(n/k)) however many values are added. Sketches built
+on different stores, chunks or processes merge by concatenating levels and
+compacting again. Rank error is roughly ``1.7 / k`` of the total count.
+"""
+import numpy as np
+
+DEFAULT_K = 200
+_CAPACITY_DECAY = 2 / 3
+
+
+class QuantileSketch:
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = k
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so no weight is lost.
+                keep, items = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+                # Adding a level shrinks every lower capacity; recheck from the bottom.
+                level = 0
+                continue
+            level += 1
+
+    def update(self, values):
+        """Add a batch of values; returns ``self`` for chaining."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold ``other`` into this sketch in place; returns ``self``."""
+        if other.count == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """Approximate quantiles for ``qs`` in [0, 1]; exact at 0 and 1."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum, qs * cum[-1], side="left")
+        out = items[np.minimum(idx, len(items) - 1)]
+        out = np.where(qs <= 0, self.min, out)
+        return np.where(qs >= 1, self.max, out)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    @property
+    def size(self):
+        """Items retained across all levels."""
+        return sum(len(items) for items in self.levels)
+
+
+def merged(sketches, k=DEFAULT_K):
+    """A new sketch holding the union of ``sketches``."""
+    out = QuantileSketch(k)
+    for sketch in sketches:
+        out.merge(sketch)
+    return out
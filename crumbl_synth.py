@@ -0,0 +1,199 @@
+"""Synthetic sales histories at production scale, learned from the mock CSV.
+
+    python crumbl_synth.py --stores 2000 --weeks 520 --output sales_10m.parquet
+
+``learn_profile`` fits the distributions in ``crumbl_mock_data.csv``: weather
+per location, the holiday rate, social media mentions per flavor (empirical
+quantiles) and sales as a linear function of flavor, location, weather,
+holiday and mentions plus Gaussian residuals. ``generate`` then yields chunks
+for any number of stores, weeks and flavors, so histories far larger than
+memory can be streamed to CSV or Parquet.
+"""
+import argparse
+import copy
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from crumbl_data import DATA_PATH, read_sales
+from crumbl_forecast import open_sink
+
+MENTION_QUANTILES = np.linspace(0, 1, 101)
+CHUNK_ROWS = 500_000
+
+
+@dataclass
+class SalesProfile:
+    locations: list
+    weathers: list
+    weather_probs: dict        # location -> P(weather), aligned with ``weathers``
+    holiday_rate: float
+    mention_quantiles: dict    # flavor -> mention values at MENTION_QUANTILES
+    flavor_effect: dict
+    location_effect: dict
+    weather_effect: dict
+    holiday_effect: float
+    mention_slope: float
+    residual_std: float
+
+    @property
+    def flavors(self):
+        return list(self.flavor_effect)
+
+
+def learn_profile(df):
+    """Fit a ``SalesProfile`` to a sales history (columns as in the mock CSV)."""
+    df = df.assign(**{name: df[name].astype(str) for name in ("location", "flavor", "weather")})
+    flavors = sorted(df["flavor"].unique())
+    locations = sorted(df["location"].unique())
+    weathers = sorted(df["weather"].unique())
+    holiday = (df["holiday"].astype(str).str.lower() == "yes").to_numpy(dtype=float)
+    mentions = df["social_media_mentions"].to_numpy(dtype=float)
+
+    weather_counts = pd.crosstab(df["location"], df["weather"]).reindex(columns=weathers, fill_value=0)
+    weather_probs = {loc: (row / row.sum()).to_numpy() for loc, row in weather_counts.iterrows()}
+
+    # sales ~ flavor + location + weather + holiday + mentions, solved by least squares.
+    design = np.column_stack(
+        [(df["flavor"] == f).to_numpy(float) for f in flavors]
+        + [(df["location"] == loc).to_numpy(float) for loc in locations]
+        + [(df["weather"] == w).to_numpy(float) for w in weathers]
+        + [holiday, mentions]
+    )
+    sales = df["units_sold"].to_numpy(dtype=float)
+    coef, *_ = np.linalg.lstsq(design, sales, rcond=None)
+    residual_std = float(np.std(sales - design @ coef))
+
+    n_f, n_l, n_w = len(flavors), len(locations), len(weathers)
+    return SalesProfile(
+        locations=locations,
+        weathers=weathers,
+        weather_probs=weather_probs,
+        holiday_rate=float(holiday.mean()),
+        mention_quantiles={
+            f: np.quantile(mentions[df["flavor"].to_numpy() == f], MENTION_QUANTILES) for f in flavors
+        },
+        flavor_effect=dict(zip(flavors, coef[:n_f])),
+        location_effect=dict(zip(locations, coef[n_f:n_f + n_l])),
+        weather_effect=dict(zip(weathers, coef[n_f + n_l:n_f + n_l + n_w])),
+        holiday_effect=float(coef[-2]),
+        mention_slope=float(coef[-1]),
+        residual_std=residual_std,
+    )
+
+
+def extend_flavors(profile, n_flavors, rng):
+    """Add made-up flavors whose effects are drawn around the learned ones."""
+    known = profile.flavors
+    effects = np.array(list(profile.flavor_effect.values()))
+    spread = effects.std() if len(effects) > 1 else 0.0
+    for i in range(len(known), n_flavors):
+        name = f"Flavor {i + 1}"
+        profile.flavor_effect[name] = float(rng.choice(effects) + rng.normal(0, spread))
+        profile.mention_quantiles[name] = profile.mention_quantiles[rng.choice(known)]
+    return profile
+
+
+def _block(profile, weeks, stores, flavors, rng, id_width):
+    """All (week, store, flavor) rows for one block of weeks x stores."""
+    n_w, n_s, n_f = len(weeks), len(stores), len(flavors)
+    n = n_w * n_s * n_f
+    week = np.repeat(weeks, n_s * n_f)
+    store = np.tile(np.repeat(stores, n_f), n_w)
+    flavor_idx = np.tile(np.arange(n_f), n_w * n_s)
+
+    n_loc = len(profile.locations)
+    loc_idx = store % n_loc
+    probs = np.array([profile.weather_probs[loc] for loc in profile.locations])
+    cdf = probs.cumsum(axis=1)[loc_idx]
+    weather_idx = np.minimum((rng.random((n, 1)) > cdf).sum(axis=1), len(profile.weathers) - 1)
+    holiday = rng.random(n) < profile.holiday_rate
+
+    # Inverse-CDF sampling of mentions from each flavor's empirical quantiles.
+    quantiles = np.array([profile.mention_quantiles[f] for f in flavors])
+    u = rng.random(n)
+    mentions = np.empty(n)
+    for i in range(n_f):
+        rows = flavor_idx == i
+        mentions[rows] = np.interp(u[rows], MENTION_QUANTILES, quantiles[i])
+    mentions = np.round(mentions).astype(np.int32)
+
+    sales = (
+        np.array([profile.flavor_effect[f] for f in flavors])[flavor_idx]
+        + np.array([profile.location_effect[loc] for loc in profile.locations])[loc_idx]
+        + np.array([profile.weather_effect[w] for w in profile.weathers])[weather_idx]
+        + profile.holiday_effect * holiday
+        + profile.mention_slope * mentions
+        + rng.normal(0, profile.residual_std, n)
+    )
+
+    store_labels = np.char.zfill((stores + 1).astype(str), id_width)
+    return pd.DataFrame({
+        "week": week.astype(np.int32),
+        "store_id": store_labels[store - stores[0]],
+        "location": pd.Categorical.from_codes(loc_idx, profile.locations),
+        "flavor": pd.Categorical.from_codes(flavor_idx, flavors),
+        "weather": pd.Categorical.from_codes(weather_idx, profile.weathers),
+        "holiday": pd.Categorical.from_codes(holiday.astype(np.int8), ["No", "Yes"]),
+        "social_media_mentions": mentions,
+        "sales": np.clip(np.round(sales), 0, None).astype(np.int32),
+    })
+
+
+def generate(profile, stores, weeks, flavors=None, chunk_rows=CHUNK_ROWS, seed=0):
+    """Yield DataFrame chunks of ``stores x weeks x flavors`` synthetic rows, week-major."""
+    rng = np.random.default_rng(seed)
+    if flavors and flavors > len(profile.flavors):
+        profile = extend_flavors(copy.deepcopy(profile), flavors, rng)
+    flavor_names = profile.flavors[:flavors] if flavors else profile.flavors
+
+    per_store_week = len(flavor_names)
+    stores_per_block = max(1, min(stores, chunk_rows // per_store_week))
+    weeks_per_block = max(1, chunk_rows // (stores_per_block * per_store_week))
+    id_width = max(3, len(str(stores)))
+    for week_start in range(1, weeks + 1, weeks_per_block):
+        week_ids = np.arange(week_start, min(weeks, week_start + weeks_per_block - 1) + 1)
+        for store_start in range(0, stores, stores_per_block):
+            store_ids = np.arange(store_start, min(stores, store_start + stores_per_block))
+            yield _block(profile, week_ids, store_ids, flavor_names, rng, id_width)
+
+
+def write(chunks, path):
+    """Stream chunks to ``path`` (.csv or Parquet); return the row count."""
+    sink = open_sink(path)
+    rows = 0
+    try:
+        for chunk in chunks:
+            sink.write(chunk)
+            rows += len(chunk)
+    finally:
+        sink.close()
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Crumbl sales history.")
+    parser.add_argument("--source", default=DATA_PATH, help="History to learn distributions from")
+    parser.add_argument("--stores", type=int, default=100)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--flavors", type=int, default=None, help="Defaults to the source's flavors")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help=".csv or .parquet path")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start = time.perf_counter()
+    profile = learn_profile(read_sales(args.source))
+    rows = write(generate(profile, args.stores, args.weeks, args.flavors, args.chunk_rows, args.seed), args.output)
+    print(f"wrote {rows:,} rows to {args.output} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
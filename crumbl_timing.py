@@ -0,0 +1,119 @@
+"""Lightweight per-stage latency tracking.
+
+Wrap a stage in ``with span("name"):`` and its wall time is added to a bounded
+window of recent samples. ``timings.summary()`` turns the windows into
+percentiles for the app's debug expander, ``prometheus_text()`` renders them in
+the Prometheus text exposition format, and ``log_summary()`` emits one JSON
+line on the ``crumbl.timing`` logger.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger("crumbl.timing")
+
+PERCENTILES = (50, 90, 99)
+WINDOW = 1024  # samples kept per stage
+
+
+class Timings:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+                self._counts[name] = 0
+                self._totals[name] = 0.0
+            self._samples[name].append(seconds)
+            self._counts[name] += 1
+            self._totals[name] += seconds
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def summary(self):
+        """Per-stage count, total and percentiles (milliseconds) over the recent window."""
+        with self._lock:
+            snapshot = {name: (np.array(s), self._counts[name], self._totals[name])
+                        for name, s in self._samples.items()}
+        out = {}
+        for name, (samples, count, total) in snapshot.items():
+            row = {"count": count, "total_ms": total * 1e3}
+            for p, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+                row[f"p{p}_ms"] = float(value) * 1e3
+            row["max_ms"] = float(samples.max()) * 1e3
+            out[name] = row
+        return out
+
+    def prometheus_text(self, metric="crumbl_stage_seconds"):
+        """Summary-type metrics in the Prometheus text format."""
+        lines = [f"# HELP {metric} Wall time per app stage.", f"# TYPE {metric} summary"]
+        for name, row in self.summary().items():
+            for p in PERCENTILES:
+                lines.append(f'{metric}{{stage="{name}",quantile="{p / 100:g}"}} {row[f"p{p}_ms"] / 1e3:.6g}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {row["total_ms"] / 1e3:.6g}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {row["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self, level=logging.INFO):
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({"stages": self.summary()}))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._totals.clear()
+
+
+class Histogram:
+    """Cumulative-bucket histogram of non-negative values (batch sizes, queue depths)."""
+
+    def __init__(self, bounds=(1, 2, 4, 8, 16, 32, 64, 128, 256)):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.total = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = next((i for i, b in enumerate(self.bounds) if value <= b), len(self.bounds))
+        with self._lock:
+            self.counts[i] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self):
+        """``{"le": {bound: cumulative count}, "sum": ..., "count": ...}``."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.total, self.count
+        cumulative = np.cumsum(counts).tolist()
+        labels = [str(b) for b in self.bounds] + ["+Inf"]
+        return {"le": dict(zip(labels, cumulative)), "sum": total, "count": count}
+
+    def prometheus_text(self, metric):
+        snap = self.snapshot()
+        lines = [f"# TYPE {metric} histogram"]
+        lines += [f'{metric}_bucket{{le="{le}"}} {n}' for le, n in snap["le"].items()]
+        lines += [f"{metric}_sum {snap['sum']}", f"{metric}_count {snap['count']}"]
+        return "\n".join(lines) + "\n"
+
+
+timings = Timings()
+span = timings.span
@@ -0,0 +1,325 @@
+"""Offline training pipeline for ``crumbl_sales_model.pkl`` / ``feature_columns.pkl``.
+
+    python crumbl_train.py --data crumbl_mock_data.csv --workers 4
+
+Reads the sales CSV, one-hot encodes it with the same encoder the app uses,
+cross-validates a small RandomForest hyperparameter grid with every
+(params, fold) fit running in a process pool, refits the best settings on the
+full history and writes both pickles atomically so a running app hot-swaps
+them on its next rerun.
+
+With ``--incremental`` the existing model is refreshed instead: trees fitted on
+the most recent weeks are appended warm_start-style (oldest trees are dropped
+past ``--max-trees``), and a full retrain happens only when error on the new
+weeks drifts past ``--drift-threshold`` times the recorded baseline. Which
+weeks each model version has seen is kept in ``<model>.meta.json``.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold
+
+from crumbl_data import DATA_PATH, read_sales
+from crumbl_features import CATEGORICAL_PREFIXES, FeatureEncoder
+from crumbl_model import FEATURES_PATH, MODEL_PATH
+
+TARGET = "units_sold"
+
+DEFAULT_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [None, 8, 16],
+    "min_samples_leaf": [1, 3],
+}
+
+
+@dataclass
+class FoldResult:
+    params: dict
+    fold: int
+    rmse: float
+    mae: float
+    fit_seconds: float
+
+
+def build_feature_columns(df):
+    """Feature order of the shipped model: holiday, mentions, then sorted one-hots."""
+    columns = ["holiday", "social_media_mentions"]
+    for field_name in ("weather", "flavor", "location"):
+        prefix = CATEGORICAL_PREFIXES[field_name]
+        columns += [prefix + str(v) for v in sorted(str(v) for v in df[field_name].unique())]
+    return columns
+
+
+def encode_training_data(df, feature_columns):
+    X = FeatureEncoder(feature_columns).encode(df)
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    return X, y
+
+
+def expand_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+# Training arrays are shipped to each worker once via the pool initializer
+# rather than pickled into every task.
+_worker_data = {}
+
+
+def _init_worker(X, y):
+    _worker_data["X"] = X
+    _worker_data["y"] = y
+
+
+def _fit_fold(params, fold, train_idx, test_idx, n_jobs, random_state):
+    X, y = _worker_data["X"], _worker_data["y"]
+    model = RandomForestRegressor(n_jobs=n_jobs, random_state=random_state, **params)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    error = model.predict(X[test_idx]) - y[test_idx]
+    return FoldResult(
+        params=params,
+        fold=fold,
+        rmse=float(np.sqrt(np.mean(error ** 2))),
+        mae=float(np.mean(np.abs(error))),
+        fit_seconds=fit_seconds,
+    )
+
+
+def cross_validate(X, y, grid=DEFAULT_GRID, folds=5, workers=None, n_jobs=1, random_state=0):
+    """Score every grid point with K-fold CV; returns all ``FoldResult``s."""
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=random_state).split(X))
+    tasks = [
+        (params, fold, train_idx, test_idx, n_jobs, random_state)
+        for params in expand_grid(grid)
+        for fold, (train_idx, test_idx) in enumerate(splits)
+    ]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y)) as pool:
+        futures = [pool.submit(_fit_fold, *task) for task in tasks]
+        return [f.result() for f in futures]
+
+
+def summarize(results):
+    """Mean CV metrics per parameter set, best (lowest RMSE) first."""
+    by_params = {}
+    for r in results:
+        by_params.setdefault(repr(sorted(r.params.items())), []).append(r)
+    rows = []
+    for group in by_params.values():
+        rows.append({
+            "params": group[0].params,
+            "rmse": float(np.mean([r.rmse for r in group])),
+            "mae": float(np.mean([r.mae for r in group])),
+            "fit_seconds": float(np.mean([r.fit_seconds for r in group])),
+        })
+    return sorted(rows, key=lambda row: row["rmse"])
+
+
+def save_atomically(objects):
+    """joblib.dump every ``{path: obj}`` to temp files, then rename them back to back.
+
+    Nothing is serialized between the renames, so readers see the old or new
+    files for all but a few microseconds (the registry rejects a mixed pair).
+    """
+    tmps = {path: f"{path}.{os.getpid()}.tmp" for path in objects}
+    try:
+        for path, obj in objects.items():
+            joblib.dump(obj, tmps[path])
+        for path, tmp in tmps.items():
+            os.replace(tmp, path)
+    finally:
+        for tmp in tmps.values():
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def save_model(model, feature_columns, model_path=MODEL_PATH, features_path=FEATURES_PATH):
+    save_atomically({features_path: list(feature_columns), model_path: model})
+
+
+def meta_path(model_path=MODEL_PATH):
+    return model_path + ".meta.json"
+
+
+def read_meta(model_path=MODEL_PATH):
+    """Training history for a model file, or None if it was not produced here."""
+    try:
+        with open(meta_path(model_path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_meta(meta, model_path=MODEL_PATH):
+    path = meta_path(model_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, path)
+
+
+def record_version(meta, mode, model, weeks, new_weeks, baseline_rmse, drift_ratio=None):
+    meta = meta or {"versions": []}
+    meta["versions"].append({
+        "version": len(meta["versions"]) + 1,
+        "mode": mode,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "weeks": sorted(int(w) for w in weeks),
+        "new_weeks": sorted(int(w) for w in new_weeks),
+        "n_estimators": len(model.estimators_),
+        "baseline_rmse": baseline_rmse,
+        "drift_ratio": drift_ratio,
+    })
+    return meta
+
+
+def rmse(model, X, y, feature_columns):
+    error = model.predict(pd.DataFrame(X, columns=feature_columns)) - y
+    return float(np.sqrt(np.mean(error ** 2)))
+
+
+def warm_update(model, X, y, feature_columns, trees=20, max_trees=300, random_state=None):
+    """Append ``trees`` trees fitted on (X, y); keep at most the newest ``max_trees``.
+
+    warm_start draws the new trees' seeds after skipping one per existing tree,
+    so once the forest sits at ``max_trees`` every update would reuse the same
+    seeds; pass a different ``random_state`` per update to avoid that.
+    """
+    if random_state is not None:
+        model.set_params(random_state=random_state)
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees)
+    model.fit(pd.DataFrame(X, columns=feature_columns), y)
+    model.set_params(warm_start=False)
+    if len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.n_estimators = max_trees
+    return model
+
+
+def train(data_path=DATA_PATH, grid=DEFAULT_GRID, folds=5, workers=None, n_jobs=1, random_state=0):
+    """Run the CV search and refit the best parameters on all rows.
+
+    Returns ``(model, feature_columns, summary, fold_results)``.
+    """
+    df = read_sales(data_path)
+    feature_columns = build_feature_columns(df)
+    X, y = encode_training_data(df, feature_columns)
+
+    results = cross_validate(X, y, grid, folds, workers, n_jobs, random_state)
+    summary = summarize(results)
+
+    model = RandomForestRegressor(n_jobs=n_jobs, random_state=random_state, **summary[0]["params"])
+    # Fit on a frame so the model records feature_names_in_, like the shipped pickle.
+    model.fit(pd.DataFrame(X, columns=feature_columns), y)
+    return model, feature_columns, summary, results
+
+
+def refresh(data_path=DATA_PATH, model_path=MODEL_PATH, features_path=FEATURES_PATH,
+            window_weeks=4, trees=20, max_trees=300, drift_threshold=1.25,
+            workers=None, n_jobs=1, random_state=0):
+    """Bring the saved model up to date with any weeks it has not seen.
+
+    Returns ``(mode, meta)`` where mode is ``"skip"``, ``"warm"`` or ``"full"``.
+    Falls back to a full retrain when there is no training history, the
+    feature set changed (e.g. a new flavor), or error on the new weeks exceeds
+    ``drift_threshold`` x the baseline RMSE.
+    """
+    df = read_sales(data_path)
+    weeks = set(int(w) for w in df["week"].unique())
+    meta = read_meta(model_path)
+    seen = set(meta["versions"][-1]["weeks"]) if meta else set()
+    new_weeks = weeks - seen
+    if meta and not new_weeks:
+        return "skip", meta
+
+    feature_columns = build_feature_columns(df)
+    model = joblib.load(model_path) if meta else None
+    drift_ratio = None
+    if meta and feature_columns == list(joblib.load(features_path)):
+        baseline = meta["versions"][-1]["baseline_rmse"]
+        new_rows = df[df["week"].isin(new_weeks)]
+        X_new, y_new = encode_training_data(new_rows, feature_columns)
+        drift_ratio = rmse(model, X_new, y_new, feature_columns) / baseline
+        if drift_ratio <= drift_threshold:
+            recent = sorted(weeks)[-window_weeks:]
+            window = df[df["week"].isin(set(recent) | new_weeks)]
+            X, y = encode_training_data(window, feature_columns)
+            warm_update(model, X, y, feature_columns, trees, max_trees, random_state + len(meta["versions"]))
+            save_model(model, feature_columns, model_path, features_path)
+            meta = record_version(meta, "warm", model, weeks, new_weeks, baseline, drift_ratio)
+            write_meta(meta, model_path)
+            return "warm", meta
+
+    model, feature_columns, summary, _ = train(data_path, workers=workers, n_jobs=n_jobs,
+                                               random_state=random_state)
+    save_model(model, feature_columns, model_path, features_path)
+    meta = record_version(meta, "full", model, weeks, new_weeks, summary[0]["rmse"], drift_ratio)
+    write_meta(meta, model_path)
+    return "full", meta
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Train the Crumbl sales RandomForest.")
+    parser.add_argument("--data", default=DATA_PATH, help="Sales history CSV")
+    parser.add_argument("--model-out", default=MODEL_PATH)
+    parser.add_argument("--features-out", default=FEATURES_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="Processes for the CV search")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Threads per RandomForest fit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--incremental", action="store_true",
+                        help="Refresh the existing model with unseen weeks instead of retraining")
+    parser.add_argument("--window-weeks", type=int, default=4, help="Recent weeks used for new trees")
+    parser.add_argument("--trees-per-update", type=int, default=20)
+    parser.add_argument("--max-trees", type=int, default=300)
+    parser.add_argument("--drift-threshold", type=float, default=1.25,
+                        help="Full retrain when new-week RMSE exceeds this multiple of the baseline")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start = time.perf_counter()
+    if args.incremental:
+        mode, meta = refresh(
+            args.data, args.model_out, args.features_out, args.window_weeks, args.trees_per_update,
+            args.max_trees, args.drift_threshold, args.workers, args.n_jobs, args.seed,
+        )
+        latest = meta["versions"][-1]
+        if mode == "skip":
+            print(f"skip: version {latest['version']} has already seen every week")
+            return 0
+        print(f"{mode}: version {latest['version']}, new weeks {latest['new_weeks']}, "
+              f"{latest['n_estimators']} trees, drift {latest['drift_ratio']} "
+              f"in {time.perf_counter() - start:.1f}s")
+        return 0
+
+    model, feature_columns, summary, results = train(
+        args.data, folds=args.folds, workers=args.workers, n_jobs=args.n_jobs, random_state=args.seed
+    )
+    for r in sorted(results, key=lambda r: (repr(r.params), r.fold)):
+        print(f"{r.params} fold {r.fold}: rmse {r.rmse:8.2f}  fit {r.fit_seconds:6.2f}s")
+    best = summary[0]
+    print(f"best {best['params']}: cv rmse {best['rmse']:.2f}, mae {best['mae']:.2f}")
+
+    save_model(model, feature_columns, args.model_out, args.features_out)
+    df_weeks = read_sales(args.data)["week"].unique()
+    meta = record_version(read_meta(args.model_out), "full", model, df_weeks, df_weeks, best["rmse"])
+    write_meta(meta, args.model_out)
+    print(f"wrote {args.model_out} and {args.features_out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from crumbl_artifact import export_artifact
+from crumbl_features import feature_encoder
+from crumbl_model import ModelRegistry
+from crumbl_predict import predict_batch
+
+
+def test_artifact_served_by_default_matches_pickle(tmp_path):
+    source = ModelRegistry().get("crumbl_sales_model.pkl", "feature_columns.pkl")
+    path = str(tmp_path / "model.forest")
+    export_artifact(source, path)
+
+    registry = ModelRegistry()
+    registry.set_default(path)
+    mapped = registry.get()
+    assert isinstance(mapped.model.compiled.threshold, np.memmap)
+    assert mapped.feature_columns == source.feature_columns
+
+    scenarios = pd.read_csv("crumbl_mock_data.csv")
+    np.testing.assert_array_equal(predict_batch(scenarios, mapped), predict_batch(scenarios, source))
+    X = feature_encoder(source).encode(scenarios)
+    np.testing.assert_array_equal(
+        mapped.model.predict(X), source.model.predict(pd.DataFrame(X, columns=source.feature_columns))
+    )
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+
+from crumbl_batching import AsyncMicroBatcher, MicroBatcher, predict_with_current_model
+from crumbl_features import UnknownCategoryError
+from crumbl_predict import predict_batch
+
+GOOD = ("Oreo", "Sunny", "Utah", True, 40)
+BAD = ("Mint", "Sunny", "Utah", 0, 1)
+CALLERS = 16
+
+
+def test_micro_batcher_coalesces_concurrent_callers():
+    batcher = MicroBatcher(max_wait=0.05)
+    barrier = threading.Barrier(CALLERS)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(batcher.predict(GOOD, timeout=30))
+
+    threads = [threading.Thread(target=call) for _ in range(CALLERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+    assert results == [float(predict_batch([GOOD])[0])] * CALLERS
+    assert batcher.rows == CALLERS
+    assert batcher.batches < CALLERS
+
+
+def test_micro_batcher_isolates_bad_scenario():
+    batcher = MicroBatcher(max_wait=0.05)
+    good, bad = batcher.submit(GOOD), batcher.submit(BAD)
+    assert good.result(30) == float(predict_batch([GOOD])[0])
+    with pytest.raises(UnknownCategoryError):
+        bad.result(30)
+    batcher.close()
+
+
+def test_async_micro_batcher_coalesces_and_isolates_errors():
+    calls = []
+
+    def predict_fn(scenarios):
+        calls.append(len(scenarios))
+        return predict_with_current_model(scenarios)
+
+    async def run():
+        async with AsyncMicroBatcher(predict_fn, max_wait=0.05) as batcher:
+            results = await asyncio.gather(
+                *(batcher.predict(GOOD) for _ in range(CALLERS)), batcher.predict(BAD), return_exceptions=True
+            )
+            return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results[:CALLERS] == [float(predict_batch([GOOD])[0])] * CALLERS
+    assert isinstance(results[-1], UnknownCategoryError)
+    assert batcher.rows == CALLERS + 1
+    assert batcher.batches < CALLERS
@@ -0,0 +1,57 @@
+import time
+
+from crumbl_cache import PredictionCache, cached_predict_one, scenario_key
+from crumbl_model import get_model
+from crumbl_predict import predict_one
+
+
+def test_hits_and_misses_are_counted():
+    cache = PredictionCache()
+    assert cache.get("a", 1) is None
+    cache.put("a", 1, 10.0)
+    assert cache.get("a", 1) == 10.0
+    assert cache.get("b", 1) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hit_rate"] == 1 / 3
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", 1, 1.0)
+    cache.put("b", 1, 2.0)
+    cache.get("a", 1)
+    cache.put("c", 1, 3.0)
+    assert cache.get("b", 1) is None
+    assert (cache.get("a", 1), cache.get("c", 1)) == (1.0, 3.0)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache(ttl=0.01)
+    cache.put("a", 1, 1.0)
+    time.sleep(0.05)
+    assert cache.get("a", 1) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_new_model_version_clears_entries():
+    cache = PredictionCache()
+    cache.put("a", 1, 1.0)
+    cache.put("b", 1, 2.0)
+    assert cache.get("a", 2) is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["invalidations"], stats["model_version"]) == (0, 1, 2)
+    cache.put("a", 2, 5.0)
+    assert cache.get("a", 2) == 5.0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_cached_predict_one_matches_predict_one():
+    cache = PredictionCache()
+    scenario = ("Oreo", "Sunny", "Utah", "Yes", 40)
+    expected = predict_one(*scenario, get_model())
+    assert cached_predict_one(*scenario, cache=cache) == expected
+    assert cached_predict_one("Oreo", "Sunny", "Utah", True, 40.0, cache=cache) == expected
+    assert scenario_key(*scenario) == scenario_key("Oreo", "Sunny", "Utah", True, 40.0)
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,27 @@
+import joblib
+import numpy as np
+import pytest
+
+from crumbl_compress import check_disjoint, compress_model, select_trees
+from crumbl_data import read_sales
+
+
+def test_check_disjoint_refuses_training_rows():
+    sales = read_sales()
+    with pytest.raises(ValueError, match="also in the training data"):
+        check_disjoint(sales.iloc[:10], sales)
+    check_disjoint(sales.iloc[:10], sales.iloc[10:])
+
+
+def test_compressed_model_keeps_selected_trees_unquantized():
+    model = joblib.load("crumbl_sales_model.pkl")
+    rng = np.random.default_rng(0)
+    per_tree = rng.normal(size=(50, len(model.estimators_)))
+    selected, history = select_trees(per_tree, per_tree.mean(axis=1), max_trees=5)
+    assert len(selected) == len(set(selected)) == len(history) <= 5
+
+    compressed = compress_model(model, selected)
+    assert compressed.n_estimators == len(selected)
+    for i, estimator in zip(sorted(selected), compressed.estimators_):
+        np.testing.assert_array_equal(estimator.tree_.value, model.estimators_[i].tree_.value)
+        np.testing.assert_array_equal(estimator.tree_.threshold, model.estimators_[i].tree_.threshold)
@@ -0,0 +1,26 @@
+import os
+import shutil
+
+import pandas as pd
+
+from crumbl_data import read_sales
+
+
+def test_cache_rebuilt_when_csv_replaced_with_older_mtime(tmp_path):
+    path = str(tmp_path / "sales.csv")
+    shutil.copy("crumbl_mock_data.csv", path)
+    for cache in ("parquet", "feather"):
+        assert len(read_sales(path, cache=cache)) == 150
+
+    pd.read_csv(path).iloc[:100].to_csv(path, index=False)
+    os.utime(path, ns=(1, 1))
+    for cache in ("parquet", "feather"):
+        assert len(read_sales(path, cache=cache)) == 100
+
+
+def test_box_stats_use_plotly_linear_quartiles():
+    from crumbl_data import build_aggregates
+
+    box = build_aggregates(read_sales()).box_stats("Oreo").set_index("weather")
+    # plotly.js quartilemethod="linear" on the raw rows: rank n * p - 0.5.
+    assert (box.loc["Cloudy", "q1"], box.loc["Cloudy", "q3"]) == (288.5, 806.5)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from crumbl_features import feature_encoder
+from crumbl_forest import compiled_forest
+from crumbl_model import ModelRegistry
+from crumbl_predict import step_table
+
+
+@pytest.fixture(scope="module")
+def loaded():
+    return ModelRegistry().get()
+
+
+def sklearn_predict(loaded, X):
+    return loaded.model.predict(pd.DataFrame(X, columns=loaded.feature_columns))
+
+
+def test_compiled_forest_matches_sklearn(loaded):
+    X = feature_encoder(loaded).encode(pd.read_csv("crumbl_mock_data.csv"))
+    forest = compiled_forest(loaded)
+    expected = sklearn_predict(loaded, X)
+    np.testing.assert_array_equal(forest.predict(X), expected)
+    assert forest.predict_row(X[0]) == expected[0]
+
+
+def test_quantized_forest_matches_sklearn(loaded):
+    X = feature_encoder(loaded).encode(pd.read_csv("crumbl_mock_data.csv"))
+    forest = compiled_forest(loaded).quantized(round_values=False)
+    np.testing.assert_array_equal(forest.predict(X), sklearn_predict(loaded, X))
+
+
+def test_step_table_matches_sklearn(loaded):
+    encoder = feature_encoder(loaded)
+    rng = np.random.default_rng(0)
+    mentions = np.concatenate([np.arange(-3, 250), rng.uniform(-10, 1000, 100), [0.5, 10.5, 1e9]])
+    rows = [
+        (f, w, loc, h, m)
+        for f in encoder.categories("flavor")
+        for w in encoder.categories("weather")
+        for loc in encoder.categories("location")
+        for h in (0, 1)
+        for m in mentions
+    ]
+    expected = sklearn_predict(loaded, encoder.encode(rows))
+    table = step_table(loaded)
+    np.testing.assert_array_equal([table.lookup(*row) for row in rows], expected)
+    assert table.lookup("Mint", "Sunny", "Utah", 0, 3) is None
+
@@ -0,0 +1,18 @@
+import joblib
+import pytest
+
+from crumbl_model import ModelRegistry
+from crumbl_train import save_model
+
+
+def test_registry_rejects_mismatched_feature_columns(tmp_path):
+    model = joblib.load("crumbl_sales_model.pkl")
+    columns = list(joblib.load("feature_columns.pkl"))
+    model_path, features_path = str(tmp_path / "m.pkl"), str(tmp_path / "f.pkl")
+
+    save_model(model, columns, model_path, features_path)
+    assert ModelRegistry().get(model_path, features_path).feature_columns == columns
+
+    joblib.dump(columns[::-1], features_path)
+    with pytest.raises(ValueError, match="different columns"):
+        ModelRegistry().get(model_path, features_path)
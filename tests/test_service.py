@@ -0,0 +1,41 @@
+import pytest
+
+from crumbl_service import create_app
+
+SCENARIO = {"flavor": "Oreo", "weather": "Sunny", "location": "Utah", "holiday": True, "social_media_mentions": 40}
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = create_app()
+    yield app.test_client()
+    app.config["batcher"].close()
+
+
+def test_predict(client):
+    response = client.post("/predict", json=SCENARIO)
+    assert response.status_code == 200
+    assert response.json["prediction"] > 0
+
+
+@pytest.mark.parametrize("mentions", ["NaN", "Infinity", "-Infinity", "many"])
+def test_predict_rejects_bad_mentions(client, mentions):
+    response = client.post("/predict", json={**SCENARIO, "social_media_mentions": mentions})
+    assert response.status_code == 400
+
+
+def test_predict_rejects_unknown_category(client):
+    assert client.post("/predict", json={**SCENARIO, "flavor": "Mint"}).status_code == 400
+
+
+@pytest.mark.parametrize("body", [[1, 2], "scenarios", 3, {"scenarios": {}}, {}])
+def test_batch_rejects_malformed_body(client, body):
+    response = client.post("/predict/batch", json=body)
+    assert response.status_code == 400
+    assert "error" in response.json
+
+
+def test_batch_interval(client):
+    response = client.post("/predict/batch", json={"scenarios": [SCENARIO, SCENARIO], "interval": True})
+    assert response.status_code == 200
+    assert len(response.json["lower"]) == 2
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from crumbl_data import SalesAccumulator, read_sales
+from crumbl_sketch import QuantileSketch, merged
+
+
+def test_quantile_sketch_rank_error():
+    values = np.random.default_rng(1).gamma(3, 200, 500_000)
+    parts = [QuantileSketch(seed=i) for i in range(4)]
+    for i, chunk in enumerate(np.array_split(values, 100)):
+        parts[i % 4].update(chunk)
+    sketch = merged(parts)
+    qs = np.array([0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99])
+    ranks = np.array([np.mean(values <= v) for v in sketch.quantiles(qs)])
+    assert sketch.count == len(values)
+    assert np.abs(ranks - qs).max() < 0.02
+    assert sketch.quantiles([0, 1]).tolist() == [values.min(), values.max()]
+    assert sketch.size < 1000
+
+
+def test_accumulator_merge_matches_single_pass():
+    df = read_sales()
+    whole = SalesAccumulator().update(df)
+    halves = SalesAccumulator().update(df.iloc[:len(df) // 2]).merge(
+        SalesAccumulator().update(df.iloc[len(df) // 2:])
+    )
+    assert halves.row_count == whole.row_count
+    for name, totals in whole.totals.items():
+        pd.testing.assert_frame_equal(halves.totals[name].sort_index(), totals.sort_index(), check_dtype=False)
+    assert halves.weather_hist.keys() == whole.weather_hist.keys()
+    for key, (offset, counts) in whole.weather_hist.items():
+        merged_offset, merged_counts = halves.weather_hist[key]
+        np.testing.assert_array_equal(np.repeat(np.arange(len(merged_counts)) + merged_offset, merged_counts),
+                                      np.repeat(np.arange(len(counts)) + offset, counts))
+    qs = [0, 0.25, 0.5, 0.75, 1]
+    assert halves.sketches.keys() == whole.sketches.keys()
+    for key, sketch in whole.sketches.items():
+        assert halves.sketches[key].count == sketch.count
+        np.testing.assert_array_equal(halves.sketches[key].quantiles(qs), sketch.quantiles(qs))
+
+    a, b = whole.finalize({}), halves.finalize({})
+    for flavor in a.flavors:
+        pd.testing.assert_frame_equal(b.box_stats(flavor), a.box_stats(flavor))
+        pd.testing.assert_frame_equal(b.by_location(flavor), a.by_location(flavor))
@@ -0,0 +1,47 @@
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from crumbl_data import read_sales
+from crumbl_train import (build_feature_columns, encode_training_data, read_meta, record_version,
+                          refresh, rmse, save_model, write_meta)
+
+
+def _seed_model(df, model_path, features_path):
+    feature_columns = build_feature_columns(df)
+    X, y = encode_training_data(df, feature_columns)
+    model = RandomForestRegressor(n_estimators=10, random_state=0)
+    model.fit(pd.DataFrame(X, columns=feature_columns), y)
+    save_model(model, feature_columns, model_path, features_path)
+    weeks = df["week"].unique()
+    write_meta(record_version(None, "full", model, weeks, weeks, rmse(model, X, y, feature_columns)), model_path)
+
+
+def test_refresh_skips_warms_and_trims(tmp_path):
+    data_path = str(tmp_path / "sales.csv")
+    model_path, features_path = str(tmp_path / "model.pkl"), str(tmp_path / "features.pkl")
+    sales = pd.read_csv("crumbl_mock_data.csv", dtype={"store_id": str})
+    sales[sales["week"] <= 8].to_csv(data_path, index=False)
+    _seed_model(read_sales(data_path), model_path, features_path)
+    kwargs = dict(trees=5, max_trees=12, drift_threshold=1e9)
+
+    mode, meta = refresh(data_path, model_path, features_path, **kwargs)
+    assert mode == "skip" and len(meta["versions"]) == 1
+
+    sales.to_csv(data_path, index=False)
+    mode, meta = refresh(data_path, model_path, features_path, **kwargs)
+    assert mode == "warm"
+    assert meta["versions"][-1]["new_weeks"] == [9, 10]
+    assert meta["versions"][-1]["n_estimators"] == 12
+    first = [tree.random_state for tree in joblib.load(model_path).estimators_[-5:]]
+
+    # Two more unseen weeks: the forest is already at max_trees, so the new
+    # trees must not repeat the previous update's seeds.
+    later = sales[sales["week"] >= 9].assign(week=lambda d: d["week"] + 2)
+    pd.concat([sales, later]).to_csv(data_path, index=False)
+    mode, meta = refresh(data_path, model_path, features_path, **kwargs)
+    assert mode == "warm" and meta["versions"][-1]["new_weeks"] == [11, 12]
+    model = joblib.load(model_path)
+    assert len(model.estimators_) == model.n_estimators == 12
+    assert set(tree.random_state for tree in model.estimators_[-5:]).isdisjoint(first)
+    assert read_meta(model_path) == meta